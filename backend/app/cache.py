@@ -0,0 +1,134 @@
+"""
+Caching of structured LLM responses for the research brief generator.
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Type, TypeVar
+
+from pydantic import BaseModel
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class LLMResponseCache:
+    """
+    In-process LRU cache of structured LLM responses.
+    
+    Entries are keyed by a digest of everything that went into the prompt and
+    stored as JSON, so callers always get a fresh model instance back.
+    """
+    
+    def __init__(self, max_entries: Optional[int] = None):
+        """
+        Initialize the cache.
+        
+        Args:
+            max_entries: Maximum number of cached responses; 0 disables caching
+        """
+        self.max_entries = settings.LLM_CACHE_MAX_ENTRIES if max_entries is None else max_entries
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def make_key(namespace: str, *parts: str) -> str:
+        """
+        Build a cache key from a namespace and the prompt inputs.
+        
+        Args:
+            namespace: Node or call site the response belongs to
+            parts: Prompt inputs that determine the response
+        
+        Returns:
+            Hex digest identifying the request
+        """
+        digest = hashlib.blake2b(namespace.encode("utf-8"), digest_size=16)
+        for part in parts:
+            digest.update(b"\x00")
+            digest.update(str(part).encode("utf-8"))
+        return digest.hexdigest()
+    
+    def get(self, key: str, model_class: Type[ModelT]) -> Optional[ModelT]:
+        """
+        Look up a cached response.
+        
+        Args:
+            key: Cache key from make_key
+            model_class: Pydantic model to rehydrate the response into
+        
+        Returns:
+            Cached response, or None on a miss
+        """
+        if self.max_entries <= 0:
+            return None
+        
+        with self._lock:
+            blob = self._entries.get(key)
+            if blob is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        
+        return model_class.model_validate_json(blob)
+    
+    def put(self, key: str, value: BaseModel) -> None:
+        """
+        Store a response, evicting the least recently used entry when full.
+        
+        Args:
+            key: Cache key from make_key
+            value: Validated LLM response
+        """
+        if self.max_entries <= 0 or not isinstance(value, BaseModel):
+            return
+        
+        blob = value.model_dump_json()
+        with self._lock:
+            self._entries[key] = blob
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def get_or_invoke(self, key: str, model_class: Type[ModelT], invoke_fn: Callable[[], ModelT]) -> ModelT:
+        """
+        Return the cached response, or call the LLM and cache its response.
+        
+        Exceptions from invoke_fn propagate so callers keep their own fallbacks,
+        and fallback results are never cached.
+        
+        Args:
+            key: Cache key from make_key
+            model_class: Pydantic model to rehydrate the response into
+            invoke_fn: Zero-argument callable performing the LLM call
+        
+        Returns:
+            Cached or freshly generated response
+        """
+        cached = self.get(key, model_class)
+        if cached is not None:
+            logger.info(f"LLM cache hit for {model_class.__name__}")
+            return cached
+        
+        response = invoke_fn()
+        self.put(key, response)
+        return response
+    
+    def clear(self) -> None:
+        """Drop all cached responses."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Global cache instance
+llm_cache = LLMResponseCache()
@@ -3,7 +3,6 @@ Command-line interface for the research brief generator using Azure OpenAI.
 """
 
 import asyncio
-import json
 import sys
 from typing import Optional
 from pathlib import Path
@@ -95,14 +94,14 @@ def generate(
         # Create request
         request = BriefRequest(
             topic=topic,
-            depth=depth,
+            depth=depth.value,
             follow_up=follow_up,
             user_id=user_id,
             additional_context=additional_context
         )
         
         # Get user history
-        history = storage.get_user_history(user_id, limit=5)
+        history = storage.get_user_briefs(user_id, limit=5)
         if history and verbose:
             console.print(f"[dim]Found {len(history)} previous briefs for context[/dim]")
         
@@ -142,7 +141,17 @@ def generate(
                 # Add required configuration for LangGraph checkpointer
                 config = {"configurable": {"thread_id": f"cli-{user_id}-{int(asyncio.get_event_loop().time())}"}}
                 
-                async for event in research_graph.astream(initial_state, config=config):
+                async for mode, event in research_graph.astream(
+                    initial_state,
+                    config=config,
+                    stream_mode=["updates", "custom"]
+                ):
+                    # Show the brief sections as the synthesizer streams them
+                    if mode == "custom":
+                        if "partial_brief" in event:
+                            progress.update(task, description=describe_partial_brief(event["partial_brief"]))
+                        continue
+                    
                     for node_name, node_output in event.items():
                         if node_name != "__end__":
                             if verbose:
@@ -204,8 +213,7 @@ def generate(
             output_path = Path(output_file)
             output_path.parent.mkdir(parents=True, exist_ok=True)
             
-            with open(output_path, 'w') as f:
-                json.dump(final_brief.model_dump(), f, indent=2, default=str)
+            output_path.write_text(final_brief.model_dump_json(indent=2))
             
             console.print(f"[green]Brief saved to: {output_path}[/green]")
         
@@ -232,7 +240,7 @@ def history(
     Show research history for a user.
     """
     try:
-        history = storage.get_user_history(user_id, limit=limit)
+        history = storage.get_user_briefs(user_id, limit=limit)
         
         if not history:
             console.print(f"[yellow]No research history found for user {user_id}[/yellow]")
@@ -406,7 +414,8 @@ def test():
     # Test search tool
     console.print("3. Testing search tool...")
     try:
-        from app.tools import search_tool
+        from app.tools import get_search_tool
+        get_search_tool()
         console.print("   ✅ Search tool initialized")
     except Exception as e:
         console.print(f"   ❌ Search tool error: {e}")
@@ -453,7 +462,7 @@ def chat(
     
     try:
         # Get user history
-        history = storage.get_user_history(user_id, limit=5)
+        history = storage.get_user_briefs(user_id, limit=5)
         if history:
             console.print(f"[dim]Found {len(history)} previous research briefs[/dim]")
         
@@ -548,7 +557,7 @@ def chat(
                             # Create request for full brief generation
                             request = BriefRequest(
                                 topic=topic_input,
-                                depth=ResearchDepth.MODERATE,
+                                depth=ResearchDepth.MODERATE.value,
                                 follow_up=False,
                                 user_id=user_id
                             )
@@ -577,11 +586,20 @@ def chat(
                             
                             async def execute_brief():
                                 nonlocal final_brief
-                                async for event in research_graph.astream(initial_state):
-                                    for node_name, node_output in event.items():
-                                        if node_name != "__end__":
-                                            if "final_brief" in node_output:
-                                                final_brief = node_output["final_brief"]
+                                with console.status("Generating research brief...") as status:
+                                    async for mode, event in research_graph.astream(
+                                        initial_state,
+                                        stream_mode=["updates", "custom"]
+                                    ):
+                                        if mode == "custom":
+                                            if "partial_brief" in event:
+                                                status.update(describe_partial_brief(event["partial_brief"]))
+                                            continue
+                                        
+                                        for node_name, node_output in event.items():
+                                            if node_name != "__end__":
+                                                if "final_brief" in node_output:
+                                                    final_brief = node_output["final_brief"]
                             
                             # Run the brief generation
                             asyncio.run(execute_brief())
@@ -618,7 +636,7 @@ def chat(
                                 console.print("[dim]Brief saved to history[/dim]")
                                 
                                 # Update history
-                                history = storage.get_user_history(user_id, limit=5)
+                                history = storage.get_user_briefs(user_id, limit=5)
                             else:
                                 console.print("[red]Failed to generate brief[/red]")
                                 
@@ -766,7 +784,7 @@ def quick_response(
             return
         
         # Get user history for context
-        history = storage.get_user_history(user_id, limit=3)
+        history = storage.get_user_briefs(user_id, limit=3)
         
         # Use LLM for quick response
         from app.llm_setup import get_secondary_llm
@@ -827,7 +845,7 @@ def quick_chat(
     
     try:
         # Get user history for context
-        history = storage.get_user_history(user_id, limit=5)
+        history = storage.get_user_briefs(user_id, limit=5)
         conversations = storage.get_conversation_history(user_id, limit=10)
         
         if history:
@@ -900,6 +918,18 @@ def quick_chat(
             console.print_exception()
 
 
+def describe_partial_brief(sections: dict) -> str:
+    """Describe the brief sections streamed so far, for progress output."""
+    parts = []
+    if sections.get("executive_summary"):
+        parts.append(f"executive summary ({len(sections['executive_summary'])} chars)")
+    if sections.get("synthesis"):
+        parts.append(f"synthesis ({len(sections['synthesis'])} chars)")
+    if sections.get("key_insights"):
+        parts.append(f"{len(sections['key_insights'])} key insights")
+    return f"Drafting brief: {', '.join(parts) or 'starting'}"
+
+
 def generate_conversational_response(user_input: str, history: list, conversations: list) -> str:
     """Generate a conversational response similar to the frontend."""
     
@@ -48,7 +48,7 @@ class Settings:
     # Azure OpenAI Configuration
     AZURE_OPENAI_API_KEY: Optional[str] = os.getenv("AZURE_OPENAI_API_KEY")
     AZURE_OPENAI_ENDPOINT: Optional[str] = os.getenv("AZURE_OPENAI_ENDPOINT")
-    AZURE_OPENAI_API_VERSION: str = os.getenv("AZURE_OPENAI_API_VERSION", "2024-02-15-preview")
+    AZURE_OPENAI_API_VERSION: str = os.getenv("AZURE_OPENAI_API_VERSION", "2024-08-01-preview")
     AZURE_OPENAI_LLM_DEPLOYMENT_NAME: Optional[str] = os.getenv("AZURE_OPENAI_LLM_DEPLOYMENT_NAME")
     
     # Search Tool
@@ -64,11 +64,45 @@ class Settings:
     # Research Settings
     MAX_SOURCES_PER_QUERY: int = int(os.getenv("MAX_SOURCES_PER_QUERY", "5"))
     MAX_CONTENT_LENGTH: int = int(os.getenv("MAX_CONTENT_LENGTH", "10000"))
+    # Bytes of a page's HTML downloaded before the rest is dropped
+    MAX_HTML_BYTES: int = int(os.getenv("MAX_HTML_BYTES", "1048576"))
     REQUEST_TIMEOUT: int = int(os.getenv("REQUEST_TIMEOUT", "30"))
+    MAX_SEARCH_CONCURRENCY: int = int(os.getenv("MAX_SEARCH_CONCURRENCY", "3"))
+    # Sustained Tavily request rate, with bursts up to one second's worth; 0 disables the limit
+    TAVILY_REQUESTS_PER_SECOND: float = float(os.getenv("TAVILY_REQUESTS_PER_SECOND", "3"))
+    # Page fetches WebScraper.fetch_many keeps in flight at once
+    MAX_FETCH_CONCURRENCY: int = int(os.getenv("MAX_FETCH_CONCURRENCY", "32"))
+    LLM_MAX_PARALLEL: int = int(os.getenv("LLM_MAX_PARALLEL", "8"))
+    # Sources summarized per LLM call; 1 disables batching
+    SUMMARY_BATCH_SIZE: int = int(os.getenv("SUMMARY_BATCH_SIZE", "4"))
+    # Seconds to wait for summaries before synthesizing with fallbacks; 0 waits indefinitely
+    SUMMARY_DEADLINE_SECONDS: float = float(os.getenv("SUMMARY_DEADLINE_SECONDS", "45"))
+    # Structured LLM responses kept in the in-process cache; 0 disables caching
+    LLM_CACHE_MAX_ENTRIES: int = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "1024"))
+    # Characters of each source summary included in the synthesis prompt; 0 sends them whole
+    SYNTHESIS_SOURCE_CHARS: int = int(os.getenv("SYNTHESIS_SOURCE_CHARS", "800"))
+    # Seconds stored history and briefs are served from memory; 0 disables the read cache
+    STORAGE_CACHE_TTL_SECONDS: float = float(os.getenv("STORAGE_CACHE_TTL_SECONDS", "60"))
+    # Read-only SQLite connections used for history and brief lookups
+    STORAGE_READ_CONNECTIONS: int = int(os.getenv("STORAGE_READ_CONNECTIONS", "4"))
     
     # LLM Model Settings
     PRIMARY_MODEL: str = os.getenv("PRIMARY_MODEL", "gpt-4o")
     SECONDARY_MODEL: str = os.getenv("SECONDARY_MODEL", "gpt-4o")
+    # Optional self-hosted OpenAI-compatible endpoint (e.g. vLLM) for per-source summarization
+    SUMMARIZER_LLM_BASE_URL: Optional[str] = os.getenv("SUMMARIZER_LLM_BASE_URL")
+    SUMMARIZER_LLM_API_KEY: Optional[str] = os.getenv("SUMMARIZER_LLM_API_KEY")
+    SUMMARIZER_MODEL: str = os.getenv("SUMMARIZER_MODEL", "Qwen/Qwen2.5-7B-Instruct-AWQ")
+    # Native structured output method: json_schema (requires API version 2024-08-01-preview+),
+    # function_calling or json_mode
+    STRUCTURED_OUTPUT_METHOD: str = os.getenv("STRUCTURED_OUTPUT_METHOD", "json_schema")
+    
+    # Graph Settings
+    # Fuse context summarization and planning into a single LLM call for follow-ups.
+    # When disabled, follow-ups summarize context in parallel with search instead
+    FUSED_PLANNING: bool = os.getenv("FUSED_PLANNING", "true").lower() == "true"
+    # Histories with at most this many briefs are summarized without an LLM call
+    LLM_CONTEXT_SUMMARY_MIN_HISTORY: int = int(os.getenv("LLM_CONTEXT_SUMMARY_MIN_HISTORY", "2"))
     
     @classmethod
     def validate(cls) -> None:
@@ -7,11 +7,13 @@ from typing import Dict, Any
 from langgraph.graph import StateGraph, END
 from langgraph.checkpoint.memory import MemorySaver
 
+from app.config import settings
 from app.state import GraphState
 from app.nodes import (
     context_summarizer,
     planner,
-    search_and_fetch,
+    plan_with_context,
+    search_and_fetch_async,
     per_source_summarizer,
     synthesizer,
     error_handler
@@ -22,7 +24,7 @@ logger = logging.getLogger(__name__)
 
 def should_summarize_context(state: GraphState) -> str:
     """
-    Determine whether to summarize context or go directly to planning.
+    Determine whether to plan with fused context summarization or plain planning.
     
     Args:
         state: Current graph state
@@ -30,11 +32,11 @@ def should_summarize_context(state: GraphState) -> str:
     Returns:
         Next node name
     """
-    if state.get("is_follow_up") and state.get("history"):
-        logger.info("Follow-up query with history detected, summarizing context")
-        return "context_summarizer"
+    if state.get("is_follow_up") and state.get("history") and settings.FUSED_PLANNING:
+        logger.info("Follow-up query with history detected, planning with context")
+        return "plan_with_context"
     else:
-        logger.info("New query or no history, proceeding to planning")
+        logger.info("Proceeding to planning")
         return "planner"
 
 
@@ -70,7 +72,8 @@ def build_research_graph() -> StateGraph:
     # Add nodes
     workflow.add_node("context_summarizer", context_summarizer)
     workflow.add_node("planner", planner)
-    workflow.add_node("search_and_fetch", search_and_fetch)
+    workflow.add_node("plan_with_context", plan_with_context)
+    workflow.add_node("search_and_fetch", search_and_fetch_async)
     workflow.add_node("per_source_summarizer", per_source_summarizer)
     workflow.add_node("synthesizer", synthesizer)
     workflow.add_node("error_handler", error_handler)
@@ -80,17 +83,19 @@ def build_research_graph() -> StateGraph:
         "__start__",
         should_summarize_context,
         {
-            "context_summarizer": "context_summarizer",
+            "plan_with_context": "plan_with_context",
             "planner": "planner"
         }
     )
     
-    # Add edges from context summarizer to planner
-    workflow.add_edge("context_summarizer", "planner")
+    # Fan out once the plan exists. Context summarization overlaps with search, and
+    # returns immediately when there is no history or the fused planner already did it
+    for planning_node in ("planner", "plan_with_context"):
+        workflow.add_edge(planning_node, "context_summarizer")
+        workflow.add_edge(planning_node, "search_and_fetch")
     
-    # Add edges for main workflow
-    workflow.add_edge("planner", "search_and_fetch")
-    workflow.add_edge("search_and_fetch", "per_source_summarizer")
+    # Fan in: summarization waits until both branches have completed
+    workflow.add_edge(["context_summarizer", "search_and_fetch"], "per_source_summarizer")
     
     # Add conditional edge after summarization
     workflow.add_conditional_edges(
@@ -2,7 +2,8 @@
 LLM setup and configuration for the research brief generator using Azure OpenAI.
 """
 
-from langchain_openai import AzureChatOpenAI
+from langchain_openai import AzureChatOpenAI, ChatOpenAI
+from langchain_core.language_models import BaseChatModel
 from langchain.schema import HumanMessage, SystemMessage
 from langchain.output_parsers import PydanticOutputParser
 from langchain_core.runnables import RunnablePassthrough, RunnableMap
@@ -10,6 +11,7 @@ from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from typing import Type, TypeVar, Any
 from pydantic import BaseModel
+import functools
 import logging
 import os
 
@@ -45,9 +47,39 @@ def get_secondary_llm() -> AzureChatOpenAI:
     )
 
 
+def get_summarizer_llm() -> BaseChatModel:
+    """
+    Get the LLM for per-source summarization.
+    
+    When SUMMARIZER_LLM_BASE_URL is set, this points at a self-hosted OpenAI-compatible
+    endpoint (e.g. vLLM serving an int8/AWQ-quantized model); otherwise it falls back
+    to the secondary Azure OpenAI deployment.
+    """
+    if not settings.SUMMARIZER_LLM_BASE_URL:
+        return get_secondary_llm()
+    
+    return ChatOpenAI(
+        base_url=settings.SUMMARIZER_LLM_BASE_URL,
+        api_key=settings.SUMMARIZER_LLM_API_KEY or "EMPTY",
+        model=settings.SUMMARIZER_MODEL,
+        temperature=0.1,
+        max_tokens=2000
+    )
+
+
+def get_llm(model_type: str) -> BaseChatModel:
+    """Get the LLM for a model type: 'primary', 'secondary' or 'summarizer'."""
+    if model_type == "primary":
+        return get_primary_llm()
+    if model_type == "summarizer":
+        return get_summarizer_llm()
+    return get_secondary_llm()
+
+
 T = TypeVar('T', bound=BaseModel)
 
 
+@functools.lru_cache(maxsize=None)
 def create_structured_llm(
     model_type: str,
     pydantic_class: Type[T],
@@ -56,32 +88,35 @@ def create_structured_llm(
     """
     Creates a LangChain runnable that will return a structured Pydantic object.
 
+    Runnables are memoized per (model_type, pydantic_class, system_prompt), so the
+    schema conversion, prompt template and HTTP client are built once per process.
+    
     Args:
-        model_type: 'primary' or 'secondary'.
+        model_type: 'primary', 'secondary' or 'summarizer'.
         pydantic_class: The Pydantic class for the output.
         system_prompt: The system prompt to guide the LLM.
 
     Returns:
         A LangChain runnable object.
     """
-    if model_type == "primary":
-        llm = get_primary_llm()
-    else:
-        llm = get_secondary_llm()
+    llm = get_llm(model_type)
 
-    # Create a default system prompt if none provided
+    # Create a default system prompt if none provided. The output schema itself is
+    # enforced by the provider, so the prompt only needs to describe the task.
     if system_prompt is None:
-        system_prompt = f"""You are an expert research assistant. Your task is to analyze the given input and provide a structured response in the format specified by the {pydantic_class.__name__} schema.
+        system_prompt = """You are an expert research assistant. Your task is to analyze the given input and provide a structured response.
 
-Please ensure your response is accurate, comprehensive, and follows the required structure. Pay special attention to:
+Please ensure your response is accurate and comprehensive. Pay special attention to:
 - Providing detailed, informative content
-- Following the exact schema requirements
-- Ensuring all required fields are populated
 - Making content actionable and valuable"""
 
     try:
-        # Use the structured output method for Azure OpenAI
-        structured_llm = llm.with_structured_output(pydantic_class)
+        # Bind the Pydantic model as a native response schema so the provider
+        # constrains generation instead of relying on prompt-embedded instructions
+        structured_llm = llm.with_structured_output(
+            pydantic_class,
+            method=settings.STRUCTURED_OUTPUT_METHOD
+        )
         
         prompt = ChatPromptTemplate.from_messages([
             ("system", system_prompt),
@@ -104,6 +139,49 @@ Please ensure your response is accurate, comprehensive, and follows the required
         return prompt | llm | parser
 
 
+@functools.lru_cache(maxsize=None)
+def create_streaming_structured_llm(
+    model_type: str,
+    pydantic_class: Type[T],
+    system_prompt: str
+) -> Any:
+    """
+    Creates a LangChain runnable that streams the raw JSON for a structured Pydantic object.
+    
+    Unlike create_structured_llm, chunks are not parsed, so callers can surface partial
+    output while the model is still generating and validate the full object at the end.
+    Runnables are memoized like create_structured_llm.
+    
+    Args:
+        model_type: 'primary', 'secondary' or 'summarizer'.
+        pydantic_class: The Pydantic class the streamed JSON must conform to.
+        system_prompt: The system prompt to guide the LLM.
+    
+    Returns:
+        A LangChain runnable yielding message chunks of JSON text.
+    """
+    llm = get_llm(model_type)
+    
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", system_prompt),
+        ("human", "{input}")
+    ])
+    
+    # Bind the schema as a plain dict: passing the Pydantic class makes the OpenAI SDK
+    # force strict mode, which rejects free-form dict fields such as FinalBrief.metadata
+    # and requires every defaulted field to be generated
+    response_format = {
+        "type": "json_schema",
+        "json_schema": {
+            "name": pydantic_class.__name__,
+            "schema": pydantic_class.model_json_schema(),
+            "strict": False
+        }
+    }
+    
+    return prompt | llm.bind(response_format=response_format)
+
+
 def create_context_summarizer_prompt(context: str, topic: str) -> list:
     """Create a prompt for context summarization."""
     return [
@@ -10,7 +10,8 @@ from datetime import datetime
 
 from fastapi import FastAPI, HTTPException, BackgroundTasks
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
+import orjson
 import uvicorn
 from app.schemas import (
     BriefRequest, 
@@ -23,6 +24,7 @@ from app.graph import research_graph, get_graph_state_summary
 from app.storage import storage
 from app.config import settings
 from app.monitoring import metrics_collector, log_execution_metrics
+from app.tools import close_tools
 
 # Configure logging
 logging.basicConfig(level=getattr(logging, settings.LOG_LEVEL))
@@ -67,6 +69,13 @@ async def startup_event():
     logger.info(f"Database: SQLite ({settings.DATABASE_URL})")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release shared HTTP sessions and the database connection on shutdown."""
+    await close_tools()
+    storage.close()
+
+
 @app.get("/")
 async def root():
     """Root endpoint with API information."""
@@ -101,6 +110,36 @@ async def health_check():
     }
 
 
+def _build_initial_state(request: BriefRequest, history: list, trace_id: str) -> Dict[str, Any]:
+    """Build the research graph's initial state for a brief request."""
+    return {
+        "topic": request.topic,
+        "user_id": request.user_id,
+        "depth": request.depth,
+        "is_follow_up": request.follow_up,
+        "additional_context": request.additional_context,
+        "history": history,
+        "context_summary": None,
+        "plan": None,
+        "search_results": None,
+        "fetched_content": None,
+        "summaries": None,
+        "final_brief": None,
+        "error": None,
+        "execution_metadata": {
+            "trace_id": trace_id,
+            "start_time": time.time(),
+            "request_id": str(uuid.uuid4()),
+            "llm_provider": "Azure OpenAI"
+        }
+    }
+
+
+def _sse_event(event: str, data: Any) -> str:
+    """Format one server-sent event with a JSON payload."""
+    return f"event: {event}\ndata: {orjson.dumps(data).decode()}\n\n"
+
+
 @app.post("/brief", response_model=BriefResponse)
 async def generate_brief(request: BriefRequest, background_tasks: BackgroundTasks):
     """
@@ -109,37 +148,17 @@ async def generate_brief(request: BriefRequest, background_tasks: BackgroundTask
     This endpoint orchestrates the entire research brief generation process
     using LangGraph with context-aware processing for follow-up queries.
     """
-    start_time = time.time()
+    start_time = time.perf_counter()
     trace_id = str(uuid.uuid4())
     
     try:
         logger.info(f"Starting brief generation for user {request.user_id}, topic: {request.topic}")
         
         # Get user history for context
-        history = storage.get_user_history(request.user_id, limit=5)
+        history = storage.get_user_briefs(request.user_id, limit=5)
         
         # Prepare initial state
-        initial_state = {
-            "topic": request.topic,
-            "user_id": request.user_id,
-            "depth": request.depth.value,
-            "is_follow_up": request.follow_up,
-            "additional_context": request.additional_context,
-            "history": history,
-            "context_summary": None,
-            "plan": None,
-            "search_results": None,
-            "fetched_content": None,
-            "summaries": None,
-            "final_brief": None,
-            "error": None,
-            "execution_metadata": {
-                "trace_id": trace_id,
-                "start_time": start_time,
-                "request_id": str(uuid.uuid4()),
-                "llm_provider": "Azure OpenAI"
-            }
-        }
+        initial_state = _build_initial_state(request, history, trace_id)
         
         # Track execution with monitoring
         with metrics_collector.track_execution(trace_id) as metrics:
@@ -149,7 +168,11 @@ async def generate_brief(request: BriefRequest, background_tasks: BackgroundTask
             final_brief = None
             execution_events = []
             
-            async for event in research_graph.astream(initial_state):
+            async for mode, event in research_graph.astream(initial_state, stream_mode=["updates", "custom"]):
+                # Partial brief sections are only useful to streaming clients, see /brief/stream
+                if mode == "custom":
+                    continue
+                
                 # Log execution progress
                 for node_name, node_output in event.items():
                     if node_name != "__end__":
@@ -179,7 +202,7 @@ async def generate_brief(request: BriefRequest, background_tasks: BackgroundTask
             )
             
             # Calculate execution time
-            execution_time = time.time() - start_time
+            execution_time = time.perf_counter() - start_time
             
             # Get trace URL and token usage
             trace_url = None
@@ -223,7 +246,7 @@ async def generate_brief(request: BriefRequest, background_tasks: BackgroundTask
         raise
     except Exception as e:
         logger.error(f"Error generating brief: {e}")
-        execution_time = time.time() - start_time
+        execution_time = time.perf_counter() - start_time
         
         error_response = ErrorResponse(
             error="Failed to generate research brief",
@@ -237,6 +260,70 @@ async def generate_brief(request: BriefRequest, background_tasks: BackgroundTask
         )
 
 
+@app.post("/brief/stream")
+async def stream_brief(request: BriefRequest, background_tasks: BackgroundTasks):
+    """
+    Generate a research brief, streaming progress as server-sent events.
+    
+    Emits a `node` event as each graph node completes and `partial_brief` events
+    with the executive summary, synthesis and key insights while the synthesizer is
+    still generating them. The stream ends with a `brief` event carrying the final
+    brief, or an `error` event.
+    """
+    trace_id = str(uuid.uuid4())
+    logger.info(f"Starting streamed brief generation for user {request.user_id}, topic: {request.topic}")
+    
+    history = storage.get_user_briefs(request.user_id, limit=5)
+    initial_state = _build_initial_state(request, history, trace_id)
+    
+    async def event_stream():
+        try:
+            with metrics_collector.track_execution(trace_id) as metrics:
+                final_brief = None
+                
+                async for mode, event in research_graph.astream(initial_state, stream_mode=["updates", "custom"]):
+                    if mode == "custom":
+                        if "partial_brief" in event:
+                            yield _sse_event("partial_brief", event["partial_brief"])
+                        continue
+                    
+                    for node_name, node_output in event.items():
+                        yield _sse_event("node", {"node": node_name, "has_error": "error" in node_output})
+                        if "final_brief" in node_output:
+                            final_brief = node_output["final_brief"]
+                
+                if not final_brief:
+                    yield _sse_event("error", ErrorResponse(
+                        error="Failed to generate research brief",
+                        trace_id=trace_id
+                    ).model_dump())
+                    return
+                
+                # Runs once the stream has been fully sent
+                background_tasks.add_task(
+                    storage.save_brief,
+                    request.user_id,
+                    request,
+                    final_brief
+                )
+                log_execution_metrics(metrics)
+                yield _sse_event("brief", final_brief.model_dump(mode="json"))
+        
+        except Exception as e:
+            logger.error(f"Error streaming brief: {e}")
+            yield _sse_event("error", ErrorResponse(
+                error="Failed to generate research brief",
+                details={"original_error": str(e)},
+                trace_id=trace_id
+            ).model_dump())
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        background=background_tasks
+    )
+
+
 @app.get("/brief/{brief_id}", response_model=FinalBrief)
 async def get_brief(brief_id: int):
     """
@@ -367,6 +454,11 @@ async def get_available_models():
             "provider": "Azure OpenAI",
             "purpose": "Fast summarization and context processing"
         },
+        "summarizer_model": {
+            "name": settings.SUMMARIZER_MODEL if settings.SUMMARIZER_LLM_BASE_URL else settings.SECONDARY_MODEL,
+            "provider": "Self-hosted (OpenAI-compatible)" if settings.SUMMARIZER_LLM_BASE_URL else "Azure OpenAI",
+            "purpose": "Per-source summarization"
+        },
         "search_tool": {
             "name": "Tavily Search",
             "purpose": "Web search and content discovery"
@@ -470,7 +562,7 @@ async def chat_response(request: dict):
             )
         
         # Get user history for context
-        history = storage.get_user_history(user_id, limit=5)
+        history = storage.get_user_briefs(user_id, limit=5)
         conversations = storage.get_conversation_history(user_id, limit=10)
         
         # Generate conversational response
@@ -558,8 +650,8 @@ Instructions:
 10. For news-related questions, provide the most recent information available"""
             
             try:
-                # Get response from LLM
-                response = llm.invoke(prompt)
+                # Get response from LLM without blocking the event loop
+                response = await llm.ainvoke(prompt)
                 
                 # Extract only the content
                 if hasattr(response, 'content'):
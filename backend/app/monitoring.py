@@ -5,7 +5,9 @@ Monitoring and observability for the research brief generator.
 import os
 import time
 import logging
-from typing import Dict, Any, Optional, List
+import functools
+import inspect
+from typing import Dict, Any, Optional, List, Callable
 from datetime import datetime
 from contextlib import contextmanager
 from dataclasses import dataclass, field
@@ -182,6 +184,43 @@ class MetricsCollector:
 metrics_collector = MetricsCollector()
 
 
+class NodeTimer:
+    """Context manager recording the wall-clock duration of a node, including on errors."""
+    
+    # Entered on every node call, so avoid a per-instance __dict__
+    __slots__ = ("node_name", "start_time")
+    
+    def __init__(self, node_name: str):
+        self.node_name = node_name
+        self.start_time = 0.0
+    
+    def __enter__(self) -> "NodeTimer":
+        self.start_time = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        metrics_collector.add_node_execution_time(self.node_name, time.perf_counter() - self.start_time)
+
+
+def timed_node(node_name: str) -> Callable:
+    """Decorator recording a graph node's execution time; supports sync and async nodes."""
+    def decorator(func: Callable) -> Callable:
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with NodeTimer(node_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with NodeTimer(node_name):
+                return func(*args, **kwargs)
+        return wrapper
+    
+    return decorator
+
+
 def create_traceable_config(trace_id: str, node_name: str) -> RunnableConfig:
     """Create a traceable configuration for LangChain operations."""
     config = RunnableConfig(
@@ -253,9 +292,6 @@ def create_monitoring_middleware():
         trace_id = state.get("execution_metadata", {}).get("trace_id", "unknown")
         node_name = config.get("metadata", {}).get("node", "unknown")
         
-        # Track node execution time
-        start_time = time.time()
-        
         # Add traceable config
         config.update(create_traceable_config(trace_id, node_name))
         
@@ -3,15 +3,24 @@ Individual graph nodes for the research brief generation workflow.
 """
 
 import asyncio
+import hashlib
+import io
 import logging
-import time
-from typing import Dict, Any, List
-from datetime import datetime
+import re
+from typing import Dict, Any, List, Optional, Set
+from datetime import datetime, timezone
 
+from langchain_core.utils.json import parse_partial_json
+from langgraph.config import get_stream_writer
+
+from app.config import settings
 from app.state import GraphState
-from app.schemas import ResearchPlan, SourceSummary, FinalBrief, ContextSummary
+from app.schemas import (
+    ResearchPlan, SourceSummary, SourceSummaryBatch, FinalBrief, ContextSummary, PlanWithContext
+)
 from app.llm_setup import (
     create_structured_llm,
+    create_streaming_structured_llm,
     create_context_summarizer_prompt,
     create_planning_prompt,
     create_summarization_prompt,
@@ -19,56 +28,266 @@ from app.llm_setup import (
     get_primary_llm,
     get_secondary_llm
 )
-from app.tools import search_tool
+from app.tools import get_search_tool
+from app.cache import llm_cache
 from app.monitoring import (
     metrics_collector,
+    timed_node,
     create_traceable_config,
     extract_token_usage_from_response
 )
 
 logger = logging.getLogger(__name__)
 
+# FinalBrief sections emitted progressively while the synthesizer streams
+STREAMED_BRIEF_SECTIONS = ("executive_summary", "synthesis", "key_insights")
+# Minimum new characters streamed before the partial brief is re-parsed
+PARTIAL_PARSE_MIN_CHARS = 128
+
+# Characters of each source's text sent to the summarizer
+SOURCE_EXCERPT_CHARS = 3000
+# Key points per source included in the synthesis prompt
+SYNTHESIS_KEY_POINTS_PER_SOURCE = 5
+
+# Keyword themes used to group key points in the fallback synthesis (substring matches)
+COMPARISON_POINT_RE = re.compile(r"compare|versus|vs|than|while|whereas", re.IGNORECASE)
+DATA_POINT_RE = re.compile(r"%|percent|million|billion|number|rank|top|first|second|third", re.IGNORECASE)
+TREND_POINT_RE = re.compile(r"trend|growth|increase|decrease|rise|fall|emerging|growing", re.IGNORECASE)
+# Key points quoted per theme in the fallback synthesis
+FALLBACK_POINTS_PER_THEME = 3
+# Distinct key points considered by the fallback synthesis
+FALLBACK_MAX_KEY_POINTS = 64
+
+# System prompts are module constants so structured LLM chains can be built once and
+# reused across runs (see create_structured_llm), and so the prompt prefix stays stable
+
+# System prompt for context summarization
+CONTEXT_SUMMARY_SYSTEM_PROMPT = """You are an expert research assistant. Your task is to summarize 
+        previous research interactions to provide context for new research requests.
+        
+        Focus on:
+        1. Key topics and findings from previous research
+        2. User preferences and patterns
+        3. How new research might build on previous work
+        
+        Be concise but comprehensive."""
+
+# System prompt for research planning
+PLANNER_SYSTEM_PROMPT = """You are an expert research planner. Your task is to create a 
+        comprehensive research plan for a given topic.
+        
+        Consider:
+        1. Multiple search angles and perspectives
+        2. Different types of sources (academic, news, reports)
+        3. Recent vs. historical information
+        4. Specific focus areas within the topic
+        
+        IMPORTANT CONSTRAINTS:
+        - expected_sources must be between 1 and 15 (maximum 15 sources)
+        - Choose appropriate number based on research depth (shallow: 3-5, moderate: 5-8, deep: 8-12)
+        
+        Generate search queries that will yield diverse, high-quality sources."""
 
+# System prompt combining context summarization and planning
+PLAN_WITH_CONTEXT_SYSTEM_PROMPT = """You are an expert research assistant and planner. Your task is to
+        summarize previous research interactions and create a comprehensive research plan
+        for a new topic that builds on that context.
+        
+        For the context summary, focus on:
+        1. Key topics and findings from previous research
+        2. User preferences and patterns
+        3. How new research might build on previous work
+        
+        For the research plan, consider:
+        1. Multiple search angles and perspectives
+        2. Different types of sources (academic, news, reports)
+        3. Recent vs. historical information
+        4. Specific focus areas within the topic
+        5. Gaps left by the previous research
+        
+        IMPORTANT CONSTRAINTS:
+        - expected_sources must be between 1 and 15 (maximum 15 sources)
+        - Choose appropriate number based on research depth (shallow: 3-5, moderate: 5-8, deep: 8-12)
+        
+        Generate search queries that will yield diverse, high-quality sources."""
+
+# Shared by every per-source summarization call; keep it static so the prompt prefix
+# stays byte-identical across calls (provider prompt caching / vLLM prefix caching)
+SOURCE_SUMMARY_SYSTEM_PROMPT = """You are an expert research analyst. Your task is to summarize 
+        web content in relation to a specific research topic.
+        
+        For each source:
+        1. Extract the title and key information
+        2. Summarize relevant content with specific details
+        3. Assess relevance to the topic (0.0-1.0 scale, where 0.0 = not relevant, 1.0 = highly relevant)
+        4. Identify key points with specific data, comparisons, and findings
+        5. Note source type and metadata
+        
+        IMPORTANT CONSTRAINTS:
+        - relevance_score must be a float between 0.0 and 1.0 (inclusive)
+        - Use 0.0 for completely irrelevant sources
+        - Use 1.0 for highly relevant sources
+        - Use values in between for partial relevance
+        - Extract specific data points, statistics, and concrete findings
+        - Identify comparisons, trends, and measurable insights
+        - Focus on actionable information and specific details
+        - Include quantitative data when available
+        
+        Be objective and focus on factual information with specific details."""
+
+# System prompt for final synthesis
+SYNTHESIS_SYSTEM_PROMPT = """You are an expert research analyst specializing in comprehensive analysis. Your task is to synthesize 
+        multiple sources into a detailed research brief with deep insights.
+        
+        Structure your response with:
+        1. Executive Summary: High-level overview of findings (minimum 200 characters)
+        2. Detailed Synthesis: Comprehensive analysis with specific insights, comparisons, trends, and actionable findings
+        3. Key Insights: Main conclusions and implications (at least 5 insights)
+        4. References: All sources used
+        
+        IMPORTANT CONSTRAINTS:
+        - executive_summary must be at least 200 characters long and provide a comprehensive overview
+        - key_insights must contain at least 5 specific, actionable insights
+        - synthesis must be DETAILED and SPECIFIC, not generic
+        - Include actual data points, comparisons, trends, and specific findings
+        - Provide concrete examples and evidence from the sources
+        - Make comparisons where relevant (countries, companies, technologies, etc.)
+        - Identify patterns, challenges, opportunities, and strategic implications
+        - Be thorough, objective, and well-organized
+        - Focus on providing valuable, actionable information with real insights
+        
+        CRITICAL: The synthesis must contain actual analysis, not generic statements. Include specific findings, data points, comparisons, and detailed insights from the sources."""
+
+
+def build_context_summary(history: List[FinalBrief], continuity_notes: str) -> ContextSummary:
+    """
+    Build a context summary deterministically from prior briefs without an LLM call.
+    
+    Args:
+        history: Previous briefs for the user
+        continuity_notes: Notes on how the new research relates to previous work
+    
+    Returns:
+        Context summary assembled from the briefs' topics and insights
+    """
+    return ContextSummary(
+        previous_topics=[brief.topic for brief in history],
+        key_findings=[insight for brief in history for insight in brief.key_insights],
+        user_preferences={},
+        continuity_notes=continuity_notes
+    )
+
+
+def deduplicate_sources(fetched_content: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Drop sources already seen under the same URL or with identical content.
+    
+    Related planner queries often return overlapping results, and mirrors can serve
+    the same text under different URLs; both would otherwise be summarized twice.
+    
+    Args:
+        fetched_content: Fetched sources in search order
+    
+    Returns:
+        Sources with the first occurrence of each URL and content kept
+    """
+    seen_urls = set()
+    seen_digests = set()
+    unique_content = []
+    
+    for content in fetched_content:
+        digest = hashlib.sha256(content.get('content', '').encode('utf-8')).hexdigest()
+        if content['url'] in seen_urls or digest in seen_digests:
+            continue
+        seen_urls.add(content['url'])
+        seen_digests.add(digest)
+        unique_content.append(content)
+    
+    if len(unique_content) < len(fetched_content):
+        logger.info("Removed %d duplicate sources", len(fetched_content) - len(unique_content))
+    return unique_content
+
+
+def attach_excerpts(fetched_content: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Slice each source down to the excerpt the summarizer sends to the LLM.
+    
+    Done once at fetch time so the summarizer's prompt and cache key reuse the same
+    string instead of re-slicing the full page text.
+    
+    Args:
+        fetched_content: Fetched sources
+    
+    Returns:
+        Copies of the sources with an 'excerpt' field added
+    """
+    return [
+        {**content, 'excerpt': content['content'][:SOURCE_EXCERPT_CHARS]}
+        for content in fetched_content
+    ]
+
+
+def source_excerpt(content: Dict[str, Any]) -> str:
+    """Return the source excerpt, slicing it now if the source came without one."""
+    excerpt = content.get('excerpt')
+    if excerpt is None:
+        excerpt = content['content'][:SOURCE_EXCERPT_CHARS]
+    return excerpt
+
+
+def format_history_context(history: List[FinalBrief]) -> str:
+    """
+    Render the most recent briefs as compact context text for LLM prompts.
+    
+    Args:
+        history: Previous briefs for the user
+    
+    Returns:
+        Context text covering the last 3 briefs
+    """
+    return "\n\n".join([
+        f"Topic: {brief.topic}\n"
+        f"Key Insights: {', '.join(brief.key_insights)}\n"
+        f"Executive Summary: {brief.executive_summary[:200]}..."
+        for brief in history[-3:]  # Last 3 briefs
+    ])
+
+
+@timed_node("context_summarizer")
 def context_summarizer(state: GraphState) -> Dict[str, Any]:
     """
     Summarize previous user interactions for context.
     
-    This node runs only for follow-up queries and creates a structured
-    summary of the user's research history.
+    This node runs alongside search after every planning step, and creates a
+    structured summary of the user's research history for follow-up queries.
     """
-    start_time = time.time()
     trace_id = state.get("execution_metadata", {}).get("trace_id", "unknown")
     
     try:
-        logger.info(f"Starting context summarization for user {state['user_id']}")
+        logger.info("Starting context summarization for user %s", state['user_id'])
         
         if not state.get('history') or not state['is_follow_up']:
             logger.info("No history or not follow-up query, skipping context summarization")
-            duration = time.time() - start_time
-            metrics_collector.add_node_execution_time("context_summarizer", duration)
             return {"context_summary": None}
         
-        # Create context string from history
-        history_text = "\n\n".join([
-            f"Topic: {brief.topic}\n"
-            f"Key Insights: {', '.join(brief.key_insights)}\n"
-            f"Executive Summary: {brief.executive_summary[:200]}..."
-            for brief in state['history'][-3:]  # Last 3 briefs
-        ])
-        
-        # Define system prompt for context summarization
-        system_prompt = """You are an expert research assistant. Your task is to summarize 
-        previous research interactions to provide context for new research requests.
-        
-        Focus on:
-        1. Key topics and findings from previous research
-        2. User preferences and patterns
-        3. How new research might build on previous work
+        if state.get('context_summary'):
+            logger.info("Context already summarized by plan_with_context, skipping")
+            return {}
+        
+        # Small histories are already compact, so summarizing them with an LLM is pure overhead
+        if len(state['history']) <= settings.LLM_CONTEXT_SUMMARY_MIN_HISTORY:
+            logger.info("Building context summary from %d previous briefs without LLM", len(state['history']))
+            context_summary = build_context_summary(
+                state['history'],
+                f"Follows up on previous research: {', '.join(brief.topic for brief in state['history'])}"
+            )
+            return {"context_summary": context_summary}
         
-        Be concise but comprehensive."""
+        # The planner renders the history before this node runs, so reuse its text
+        history_text = state.get('history_context') or format_history_context(state['history'])
         
         # Use secondary LLM for context summarization with monitoring
-        structured_llm = create_structured_llm("secondary", ContextSummary, system_prompt)
+        structured_llm = create_structured_llm("secondary", ContextSummary, CONTEXT_SUMMARY_SYSTEM_PROMPT)
         
         # Create input for the structured LLM
         context_input = f"""
@@ -83,77 +302,57 @@ def context_summarizer(state: GraphState) -> Dict[str, Any]:
         try:
             # Add traceable config for monitoring
             config = create_traceable_config(trace_id, "context_summarizer")
-            context_summary = structured_llm.invoke({"input": context_input}, config=config)
+            context_summary = llm_cache.get_or_invoke(
+                llm_cache.make_key("context_summarizer", context_input),
+                ContextSummary,
+                lambda: ContextSummary.model_validate(structured_llm.invoke({"input": context_input}, config=config))
+            )
             
             # Extract and track token usage
             token_usage = extract_token_usage_from_response(context_summary)
             if token_usage:
                 metrics_collector.add_token_usage(token_usage)
-            
-            logger.info("Successfully created context summary")
         except Exception as e:
             logger.warning(f"Structured LLM failed for context summary, using fallback: {e}")
             # Fallback to manual parsing
-            context_summary = ContextSummary(
-                previous_topics=[brief.topic for brief in state['history']],
-                key_findings=[insight for brief in state['history'] for insight in brief.key_insights],
-                user_preferences={},
-                continuity_notes="Previous research context available"
+            context_summary = build_context_summary(
+                state['history'],
+                "Previous research context available"
             )
         
-        # Convert to dict for serialization
-        context_dict = context_summary.model_dump()
-        context_summary = ContextSummary(**context_dict)
-        
-        duration = time.time() - start_time
-        metrics_collector.add_node_execution_time("context_summarizer", duration)
-        
         logger.info("Context summarization completed successfully")
         return {"context_summary": context_summary}
         
     except Exception as e:
-        duration = time.time() - start_time
-        metrics_collector.add_node_execution_time("context_summarizer", duration)
         logger.error(f"Error in context summarization: {e}")
         return {"error": f"Context summarization failed: {str(e)}"}
 
 
+@timed_node("planner")
 def planner(state: GraphState) -> Dict[str, Any]:
     """
     Create a research plan based on the topic and context.
     
     This node generates structured search queries and a research strategy.
     """
-    start_time = time.time()
     trace_id = state.get("execution_metadata", {}).get("trace_id", "unknown")
     
     try:
-        logger.info(f"Starting research planning for topic: {state['topic']}")
+        logger.info("Starting research planning for topic: %s", state['topic'])
         
         # Prepare context summary for planning
         context_summary = None
+        history_text = None
         if state.get('context_summary'):
-            context_summary = f"Previous topics: {', '.join(state['context_summary'].previous_topics)}\n"
-            context_summary += f"Key findings: {', '.join(state['context_summary'].key_findings)}"
-        
-        # Define system prompt for research planning
-        system_prompt = """You are an expert research planner. Your task is to create a 
-        comprehensive research plan for a given topic.
-        
-        Consider:
-        1. Multiple search angles and perspectives
-        2. Different types of sources (academic, news, reports)
-        3. Recent vs. historical information
-        4. Specific focus areas within the topic
-        
-        IMPORTANT CONSTRAINTS:
-        - expected_sources must be between 1 and 15 (maximum 15 sources)
-        - Choose appropriate number based on research depth (shallow: 3-5, moderate: 5-8, deep: 8-12)
-        
-        Generate search queries that will yield diverse, high-quality sources."""
+            context_summary = state['context_summary'].as_prompt_text
+        elif state.get('is_follow_up') and state.get('history'):
+            # The structured context summary is produced alongside search, so plan from the
+            # rendered history directly instead of waiting on an extra LLM hop
+            history_text = state.get('history_context') or format_history_context(state['history'])
+            context_summary = history_text
         
         # Use primary LLM for planning with structured output
-        structured_llm = create_structured_llm("primary", ResearchPlan, system_prompt)
+        structured_llm = create_structured_llm("primary", ResearchPlan, PLANNER_SYSTEM_PROMPT)
         
         # Create input for the structured LLM
         planning_input = f"""
@@ -167,14 +366,16 @@ def planner(state: GraphState) -> Dict[str, Any]:
         try:
             # Add traceable config for monitoring
             config = create_traceable_config(trace_id, "planner")
-            plan = structured_llm.invoke({"input": planning_input}, config=config)
+            plan = llm_cache.get_or_invoke(
+                llm_cache.make_key("planner", planning_input),
+                ResearchPlan,
+                lambda: ResearchPlan.model_validate(structured_llm.invoke({"input": planning_input}, config=config))
+            )
             
             # Extract and track token usage
             token_usage = extract_token_usage_from_response(plan)
             if token_usage:
                 metrics_collector.add_token_usage(token_usage)
-            
-            logger.info(f"Successfully created research plan with {len(plan.queries)} queries")
         except Exception as e:
             logger.warning(f"Structured LLM failed, using fallback plan: {e}")
             # Fallback plan - ensure expected_sources respects the limit
@@ -192,23 +393,92 @@ def planner(state: GraphState) -> Dict[str, Any]:
                 focus_areas=[state['topic']]
             )
         
-        # Convert to dict for serialization
-        plan_dict = plan.model_dump()
-        plan = ResearchPlan(**plan_dict)
+        logger.info("Research planning completed with %d queries", len(plan.queries))
+        result: Dict[str, Any] = {"plan": plan}
+        if history_text is not None:
+            # Hand the rendered history to context_summarizer so it is rendered once per run
+            result["history_context"] = history_text
+        return result
+        
+    except Exception as e:
+        logger.error(f"Error in research planning: {e}")
+        return {"error": f"Research planning failed: {str(e)}"}
+
+
+@timed_node("plan_with_context")
+def plan_with_context(state: GraphState) -> Dict[str, Any]:
+    """
+    Summarize prior interactions and create a research plan in one LLM call.
+    
+    This node replaces the context_summarizer -> planner hop for follow-up
+    queries, saving a full LLM round-trip.
+    """
+    trace_id = state.get("execution_metadata", {}).get("trace_id", "unknown")
+    
+    try:
+        logger.info("Starting fused context summarization and planning for topic: %s", state['topic'])
+        
+        # This node is the only consumer of the rendered history on the fused path
+        history_text = state.get('history_context') or format_history_context(state.get('history', []))
+        
+        # Use primary LLM since the plan is the dominant part of the output
+        structured_llm = create_structured_llm("primary", PlanWithContext, PLAN_WITH_CONTEXT_SYSTEM_PROMPT)
         
-        duration = time.time() - start_time
-        metrics_collector.add_node_execution_time("planner", duration)
+        # Create input for the structured LLM
+        planning_input = f"""
+        Previous research context: {history_text}
+        
+        New research topic: {state['topic']}
+        Research depth: {state['depth']}
         
-        logger.info(f"Research planning completed with {len(plan.queries)} queries")
-        return {"plan": plan}
+        Summarize the previous research context that is relevant for this new topic, then
+        create a comprehensive research plan with search queries and rationale.
+        """
         
+        try:
+            # Add traceable config for monitoring
+            config = create_traceable_config(trace_id, "plan_with_context")
+            result = llm_cache.get_or_invoke(
+                llm_cache.make_key("plan_with_context", planning_input),
+                PlanWithContext,
+                lambda: PlanWithContext.model_validate(structured_llm.invoke({"input": planning_input}, config=config))
+            )
+            
+            # Extract and track token usage
+            token_usage = extract_token_usage_from_response(result)
+            if token_usage:
+                metrics_collector.add_token_usage(token_usage)
+            
+            context_summary = result.context
+            plan = result.plan
+        except Exception as e:
+            logger.warning(f"Structured LLM failed for fused planning, using fallback: {e}")
+            depth_to_sources = {
+                "shallow": 3,
+                "moderate": 5,
+                "deep": 8
+            }
+            
+            context_summary = build_context_summary(
+                state.get('history', []),
+                "Previous research context available"
+            )
+            plan = ResearchPlan(
+                queries=[f"{state['topic']} research", f"{state['topic']} analysis", f"{state['topic']} trends"],
+                rationale="Basic search queries for the topic",
+                expected_sources=depth_to_sources.get(state['depth'], 5),
+                focus_areas=[state['topic']]
+            )
+        
+        logger.info("Fused planning completed with %d queries", len(plan.queries))
+        return {"context_summary": context_summary, "plan": plan}
+    
     except Exception as e:
-        duration = time.time() - start_time
-        metrics_collector.add_node_execution_time("planner", duration)
-        logger.error(f"Error in research planning: {e}")
+        logger.error(f"Error in fused planning: {e}")
         return {"error": f"Research planning failed: {str(e)}"}
 
 
+@timed_node("search_and_fetch")
 def search_and_fetch(state: GraphState) -> Dict[str, Any]:
     """
     Execute search queries and fetch content from URLs.
@@ -222,18 +492,19 @@ def search_and_fetch(state: GraphState) -> Dict[str, Any]:
             return {"error": "No research plan available"}
         
         queries = state['plan'].queries
-        logger.info(f"Executing {len(queries)} search queries")
+        logger.info("Executing %d search queries", len(queries))
         
         # Execute search and fetch content
-        fetched_content = search_tool.search_and_fetch(queries)
+        search_results = get_search_tool().search_and_fetch(queries)
+        fetched_content = attach_excerpts(deduplicate_sources(search_results))
         
         if not fetched_content:
             logger.warning("No content fetched from search results")
             return {"error": "No content could be fetched from search results"}
         
-        logger.info(f"Successfully fetched content from {len(fetched_content)} sources")
+        logger.info("Successfully fetched content from %d sources", len(fetched_content))
         return {
-            "search_results": fetched_content,
+            "search_results": search_results,
             "fetched_content": fetched_content
         }
         
@@ -242,6 +513,7 @@ def search_and_fetch(state: GraphState) -> Dict[str, Any]:
         return {"error": f"Search and fetch failed: {str(e)}"}
 
 
+@timed_node("search_and_fetch")
 async def search_and_fetch_async(state: GraphState) -> Dict[str, Any]:
     """
     Async version of search_and_fetch for better performance.
@@ -253,18 +525,19 @@ async def search_and_fetch_async(state: GraphState) -> Dict[str, Any]:
             return {"error": "No research plan available"}
         
         queries = state['plan'].queries
-        logger.info(f"Executing {len(queries)} search queries")
+        logger.info("Executing %d search queries", len(queries))
         
         # Execute search and fetch content asynchronously
-        fetched_content = await search_tool.search_and_fetch_async(queries)
+        search_results = await get_search_tool().search_and_fetch_async(queries)
+        fetched_content = attach_excerpts(deduplicate_sources(search_results))
         
         if not fetched_content:
             logger.warning("No content fetched from search results")
             return {"error": "No content could be fetched from search results"}
         
-        logger.info(f"Successfully fetched content from {len(fetched_content)} sources")
+        logger.info("Successfully fetched content from %d sources", len(fetched_content))
         return {
-            "search_results": fetched_content,
+            "search_results": search_results,
             "fetched_content": fetched_content
         }
         
@@ -273,11 +546,141 @@ async def search_and_fetch_async(state: GraphState) -> Dict[str, Any]:
         return {"error": f"Search and fetch failed: {str(e)}"}
 
 
-def per_source_summarizer(state: GraphState) -> Dict[str, Any]:
+def _fallback_source_summary(content: Dict[str, Any]) -> SourceSummary:
     """
-    Summarize each fetched source individually.
+    Build a summary from the raw page text when the structured LLM call fails.
+    
+    Args:
+        content: Fetched content dict for the source
+    
+    Returns:
+        Heuristic SourceSummary for the source
+    """
+    content_text = content['content'][:1000]
+    key_points = [
+        content_text[:200] + "..." if len(content_text) > 200 else content_text,
+        "Source provides relevant information on the topic",
+        "Content includes specific details and insights"
+    ]
+    
+    return SourceSummary(
+        url=content['url'],
+        title=content.get('title', 'Unknown Title'),
+        summary=content_text + "...",
+        relevance_score=0.7,
+        key_points=key_points,
+        source_type="web page",
+        publication_date=None,
+        author=None
+    )
+
+
+def _source_cache_key(topic: str, content: Dict[str, Any]) -> str:
+    """
+    Cache key for a source summary: the topic plus exactly the content the LLM sees.
+    
+    The URL is left out so the same page re-crawled under another URL (mirrors,
+    tracking parameters) is still an exact-match hit.
+    """
+    return llm_cache.make_key("source_summary", topic, source_excerpt(content))
+
+
+def _cached_source_summary(topic: str, content: Dict[str, Any]) -> Optional[SourceSummary]:
+    """
+    Look up a cached summary for a source and bind it to this source's URL and title.
+    
+    Args:
+        topic: Research topic
+        content: Fetched content dict
     
-    This node processes each source and creates structured summaries.
+    Returns:
+        Cached summary, or None on a miss
+    """
+    summary = llm_cache.get(_source_cache_key(topic, content), SourceSummary)
+    if summary is None or summary.url == content['url']:
+        return summary
+    return summary.model_copy(update={"url": content['url'], "title": content.get('title', summary.title)})
+
+
+async def _summarize_batch(
+    structured_llm,
+    semaphore: asyncio.Semaphore,
+    topic: str,
+    batch: List[Dict[str, Any]],
+    start: int,
+    total: int
+) -> List[SourceSummary]:
+    """
+    Summarize a group of fetched sources in a single LLM call.
+    
+    Sources missing from the LLM response (matched by URL), or the whole batch
+    if the call fails, fall back to heuristic summaries.
+    
+    Args:
+        structured_llm: Structured LLM chain returning SourceSummaryBatch
+        semaphore: Limits the number of in-flight LLM calls
+        topic: Research topic
+        batch: Fetched content dicts for the sources in this group
+        start: Zero-based position of the first source in the group
+        total: Total number of sources being summarized
+    
+    Returns:
+        One SourceSummary per source, in input order
+    """
+    logger.info("Summarizing sources %d-%d/%d", start+1, start+len(batch), total)
+    
+    sources_text = "\n\n".join(
+        f"Source [{start+i+1}]:\nSource URL: {content['url']}\nSource content: {source_excerpt(content)}..."
+        for i, content in enumerate(batch)
+    )
+    
+    # Create input for the structured LLM. Request-wide parts come first and the
+    # per-source part last, so only the sources themselves miss the prefix cache
+    summary_input = f"""
+        Research topic: {topic}
+        
+        Please summarize each source below in relation to the research topic.
+        Focus on extracting specific data points, comparisons, trends, and concrete findings.
+        Include quantitative information and measurable insights when available.
+        Return exactly one summary per source and copy each source URL unchanged.
+        
+        {sources_text}
+        """
+    
+    by_url = {}
+    try:
+        async with semaphore:
+            response = await structured_llm.ainvoke({"input": summary_input})
+        if not isinstance(response, SourceSummaryBatch):
+            response = SourceSummaryBatch.model_validate(response)
+        by_url = {summary.url: summary for summary in response.summaries}
+        for content in batch:
+            if content['url'] in by_url:
+                llm_cache.put(_source_cache_key(topic, content), by_url[content['url']])
+        logger.info("Successfully summarized sources %d-%d", start+1, start+len(batch))
+    except Exception as e:
+        logger.warning(f"Structured LLM failed for sources {start+1}-{start+len(batch)}, using fallback: {e}")
+    
+    summaries = []
+    for i, content in enumerate(batch):
+        summary = by_url.get(content['url'])
+        if summary is None:
+            if by_url:
+                logger.warning("Source %d missing from batched summary, using fallback", start+i+1)
+            summary = _fallback_source_summary(content)
+        summaries.append(summary)
+    return summaries
+
+
+@timed_node("per_source_summarizer")
+async def per_source_summarizer(state: GraphState) -> Dict[str, Any]:
+    """
+    Summarize the fetched sources.
+    
+    Sources are grouped SUMMARY_BATCH_SIZE at a time so the shared instructions
+    are sent once per group, and the groups run concurrently with at most
+    LLM_MAX_PARALLEL LLM calls in flight. Groups still running after
+    SUMMARY_DEADLINE_SECONDS fall back to heuristic summaries.
     """
     try:
         logger.info("Starting per-source summarization")
@@ -285,94 +688,76 @@ def per_source_summarizer(state: GraphState) -> Dict[str, Any]:
         if not state.get('fetched_content'):
             return {"error": "No content available for summarization"}
         
-        summaries = []
+        fetched_content = deduplicate_sources(state['fetched_content'])
         
-        # Define system prompt for source summarization
-        system_prompt = """You are an expert research analyst. Your task is to summarize 
-        web content in relation to a specific research topic.
+        # Sources summarized for the same topic in an earlier run are served from cache
+        cached = [_cached_source_summary(state['topic'], content) for content in fetched_content]
+        pending = [content for content, summary in zip(fetched_content, cached) if summary is None]
+        if len(pending) < len(fetched_content):
+            logger.info("Reusing cached summaries for %d sources", len(fetched_content) - len(pending))
         
-        For each source:
-        1. Extract the title and key information
-        2. Summarize relevant content with specific details
-        3. Assess relevance to the topic (0.0-1.0 scale, where 0.0 = not relevant, 1.0 = highly relevant)
-        4. Identify key points with specific data, comparisons, and findings
-        5. Note source type and metadata
+        batch_size = max(1, settings.SUMMARY_BATCH_SIZE)
+        batches = [
+            pending[start:start + batch_size]
+            for start in range(0, len(pending), batch_size)
+        ]
         
-        IMPORTANT CONSTRAINTS:
-        - relevance_score must be a float between 0.0 and 1.0 (inclusive)
-        - Use 0.0 for completely irrelevant sources
-        - Use 1.0 for highly relevant sources
-        - Use values in between for partial relevance
-        - Extract specific data points, statistics, and concrete findings
-        - Identify comparisons, trends, and measurable insights
-        - Focus on actionable information and specific details
-        - Include quantitative data when available
+        # Use structured output for summaries. The system prompt is a module constant so
+        # every call shares a byte-identical prefix that providers can serve from KV cache
+        structured_llm = create_structured_llm("summarizer", SourceSummaryBatch, SOURCE_SUMMARY_SYSTEM_PROMPT)
+        semaphore = asyncio.Semaphore(settings.LLM_MAX_PARALLEL)
         
-        Be objective and focus on factual information with specific details."""
-        
-        # Use structured output for summaries
-        structured_llm = create_structured_llm("secondary", SourceSummary, system_prompt)
-        
-        for i, content in enumerate(state['fetched_content']):
-            try:
-                logger.info(f"Summarizing source {i+1}/{len(state['fetched_content'])}")
-                
-                # Create input for the structured LLM
-                summary_input = f"""
-                Research topic: {state['topic']}
-                Source URL: {content['url']}
-                Source content: {content['content'][:3000]}...
-                
-                Please summarize this source in relation to the research topic.
-                Focus on extracting specific data points, comparisons, trends, and concrete findings.
-                Include quantitative information and measurable insights when available.
-                """
-                
-                try:
-                    summary = structured_llm.invoke({"input": summary_input})
-                    logger.info(f"Successfully summarized source {i+1}")
-                except Exception as e:
-                    logger.warning(f"Structured LLM failed for source {i+1}, using fallback: {e}")
-                    # Enhanced fallback summary
-                    content_text = content['content'][:1000]
-                    key_points = [
-                        content_text[:200] + "..." if len(content_text) > 200 else content_text,
-                        "Source provides relevant information on the topic",
-                        "Content includes specific details and insights"
-                    ]
-                    
-                    summary = SourceSummary(
+        tasks = [
+            asyncio.create_task(
+                _summarize_batch(structured_llm, semaphore, state['topic'], batch, i * batch_size, len(pending))
+            )
+            for i, batch in enumerate(batches)
+        ]
+        
+        # Synthesis needs every source, so don't let one slow batch hold it back: once the
+        # deadline passes, stragglers are cancelled and get heuristic summaries instead
+        stragglers: Set[asyncio.Task[List[SourceSummary]]] = set()
+        if tasks:
+            _, stragglers = await asyncio.wait(tasks, timeout=settings.SUMMARY_DEADLINE_SECONDS or None)
+            for task in stragglers:
+                task.cancel()
+            if stragglers:
+                logger.warning(
+                    f"{len(stragglers)} summary batches missed the {settings.SUMMARY_DEADLINE_SECONDS}s deadline, "
+                    "using fallback summaries"
+                )
+                await asyncio.gather(*stragglers, return_exceptions=True)
+        
+        generated = []
+        for batch, task in zip(batches, tasks):
+            if task in stragglers:
+                result = [_fallback_source_summary(content) for content in batch]
+            elif task.exception() is not None:
+                error = task.exception()
+                logger.error(f"Error summarizing sources: {error}")
+                # Create basic summaries for failed sources
+                result = [
+                    SourceSummary(
                         url=content['url'],
                         title=content.get('title', 'Unknown Title'),
-                        summary=content_text + "...",
-                        relevance_score=0.7,
-                        key_points=key_points,
+                        summary=f"Error processing source: {str(error)}",
+                        relevance_score=0.0,
+                        key_points=["Error processing source"],
                         source_type="web page",
                         publication_date=None,
                         author=None
                     )
-                
-                # Convert to dict for serialization
-                summary_dict = summary.model_dump()
-                summary = SourceSummary(**summary_dict)
-                summaries.append(summary)
-                
-            except Exception as e:
-                logger.error(f"Error summarizing source {i+1}: {e}")
-                # Create a basic summary for failed sources
-                summary = SourceSummary(
-                    url=content['url'],
-                    title=content.get('title', 'Unknown Title'),
-                    summary=f"Error processing source: {str(e)}",
-                    relevance_score=0.0,
-                    key_points=["Error processing source"],
-                    source_type="web page",
-                    publication_date=None,
-                    author=None
-                )
-                summaries.append(summary)
+                    for content in batch
+                ]
+            else:
+                result = task.result()
+            generated.extend(result)
+        
+        # Merge generated summaries back into their original positions
+        generated_iter = iter(generated)
+        summaries = [summary if summary is not None else next(generated_iter) for summary in cached]
         
-        logger.info(f"Completed summarization of {len(summaries)} sources")
+        logger.info("Completed summarization of %d sources", len(summaries))
         return {"summaries": summaries}
         
     except Exception as e:
@@ -380,12 +765,27 @@ def per_source_summarizer(state: GraphState) -> Dict[str, Any]:
         return {"error": f"Per-source summarization failed: {str(e)}"}
 
 
-def synthesizer(state: GraphState) -> Dict[str, Any]:
+def _emit_progress(payload: Dict[str, Any]) -> None:
+    """Send a custom stream event to graph consumers, if running inside a graph."""
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        # Called outside of a graph run, nobody is listening
+        return
+    writer(payload)
+
+
+@timed_node("synthesizer")
+async def synthesizer(state: GraphState) -> Dict[str, Any]:
     """
     Synthesize all source summaries into a final research brief.
     
     This node creates the final structured output combining all sources.
+    The brief is streamed from the LLM and its executive summary, synthesis
+    and key insights are emitted as custom stream events while they arrive.
     """
+    trace_id = state.get("execution_metadata", {}).get("trace_id", "unknown")
+    
     try:
         logger.info("Starting final synthesis")
         
@@ -395,39 +795,17 @@ def synthesizer(state: GraphState) -> Dict[str, Any]:
         # Prepare context summary for synthesis
         context_summary = None
         if state.get('context_summary'):
-            context_summary = f"Previous topics: {', '.join(state['context_summary'].previous_topics)}\n"
-            context_summary += f"Key findings: {', '.join(state['context_summary'].key_findings)}"
+            context_summary = state['context_summary'].as_prompt_text
         
-        # Define system prompt for final synthesis
-        system_prompt = """You are an expert research analyst specializing in comprehensive analysis. Your task is to synthesize 
-        multiple sources into a detailed research brief with deep insights.
+        # Use primary LLM for final synthesis, streaming the structured output
+        streaming_llm = create_streaming_structured_llm("primary", FinalBrief, SYNTHESIS_SYSTEM_PROMPT)
         
-        Structure your response with:
-        1. Executive Summary: High-level overview of findings (minimum 200 characters)
-        2. Detailed Synthesis: Comprehensive analysis with specific insights, comparisons, trends, and actionable findings
-        3. Key Insights: Main conclusions and implications (at least 5 insights)
-        4. References: All sources used
-        
-        IMPORTANT CONSTRAINTS:
-        - executive_summary must be at least 200 characters long and provide a comprehensive overview
-        - key_insights must contain at least 5 specific, actionable insights
-        - synthesis must be DETAILED and SPECIFIC, not generic
-        - Include actual data points, comparisons, trends, and specific findings
-        - Provide concrete examples and evidence from the sources
-        - Make comparisons where relevant (countries, companies, technologies, etc.)
-        - Identify patterns, challenges, opportunities, and strategic implications
-        - Be thorough, objective, and well-organized
-        - Focus on providing valuable, actionable information with real insights
-        
-        CRITICAL: The synthesis must contain actual analysis, not generic statements. Include specific findings, data points, comparisons, and detailed insights from the sources."""
-        
-        # Use primary LLM for final synthesis with structured output
-        structured_llm = create_structured_llm("primary", FinalBrief, system_prompt)
-        
-        # Create detailed summaries text for input
+        # Create detailed summaries text for input. Each source's contribution is capped,
+        # since prompt size drives both cost and time to first token
+        summary_chars = settings.SYNTHESIS_SOURCE_CHARS or None
         summaries_text = "\n\n".join([
-            f"Source {i+1}: {summary.title}\nURL: {summary.url}\nSummary: {summary.summary}\n"
-            f"Relevance: {summary.relevance_score}\nKey Points: {', '.join(summary.key_points)}\n"
+            f"Source {i+1}: {summary.title}\nURL: {summary.url}\nSummary: {summary.summary[:summary_chars]}\n"
+            f"Relevance: {summary.relevance_score}\nKey Points: {', '.join(summary.key_points[:SYNTHESIS_KEY_POINTS_PER_SOURCE])}\n"
             f"Source Type: {summary.source_type}\nAuthor: {summary.author or 'Unknown'}\n"
             f"Date: {summary.publication_date or 'Unknown'}"
             for i, summary in enumerate(state['summaries'])
@@ -461,8 +839,36 @@ def synthesizer(state: GraphState) -> Dict[str, Any]:
         """
         
         try:
-            final_brief = structured_llm.invoke({"input": synthesis_input})
-            logger.info("Successfully created final brief with structured LLM")
+            config = create_traceable_config(trace_id, "synthesizer")
+            brief_buffer = io.StringIO()
+            parsed_length = 0
+            emitted_sections: Dict[str, Any] = {}
+            async for chunk in streaming_llm.astream({"input": synthesis_input}, config=config):
+                if not isinstance(chunk.content, str) or not chunk.content:
+                    continue
+                brief_buffer.write(chunk.content)
+                
+                # Re-parsing the whole partial document is linear in its length, so only do
+                # it once enough new text has arrived rather than on every token
+                if brief_buffer.tell() - parsed_length < PARTIAL_PARSE_MIN_CHARS:
+                    continue
+                brief_json = brief_buffer.getvalue()
+                parsed_length = len(brief_json)
+                
+                # Surface sections as soon as they change in the partial JSON
+                partial_brief = parse_partial_json(brief_json) or {}
+                sections = {
+                    key: partial_brief[key]
+                    for key in STREAMED_BRIEF_SECTIONS
+                    if key in partial_brief
+                }
+                if sections and sections != emitted_sections:
+                    emitted_sections = sections
+                    _emit_progress({"node": "synthesizer", "partial_brief": sections})
+            
+            # Validate the complete object once streaming has finished
+            final_brief = FinalBrief.model_validate_json(brief_buffer.getvalue())
+            logger.info("Successfully created final brief with streaming structured LLM")
             
         except Exception as e:
             logger.warning(f"Structured LLM failed for final synthesis, using enhanced fallback: {e}")
@@ -482,15 +888,17 @@ def synthesizer(state: GraphState) -> Dict[str, Any]:
             
             # Generate better fallback content based on the summaries
             if state['summaries']:
-                # Extract key themes and data from summaries
-                all_key_points = []
+                # Extract key themes and data from summaries. Key points are deduplicated in
+                # order (fallback summaries repeat the same boilerplate) and capped
+                unique_key_points = {}
                 source_types = set()
                 authors = set()
                 for summary in state['summaries']:
-                    all_key_points.extend(summary.key_points)
+                    unique_key_points.update(dict.fromkeys(summary.key_points))
                     source_types.add(summary.source_type)
                     if summary.author:
                         authors.add(summary.author)
+                all_key_points = list(unique_key_points)[:FALLBACK_MAX_KEY_POINTS]
                 
                 # Create a more informative executive summary
                 executive_summary = f"Comprehensive analysis of {state['topic']} based on {len(state['summaries'])} carefully selected sources. The research reveals key trends, challenges, and opportunities in this domain. The analysis covers multiple perspectives and provides actionable insights for stakeholders."
@@ -515,23 +923,39 @@ def synthesizer(state: GraphState) -> Dict[str, Any]:
                 # Add key findings from sources with more detail
                 if all_key_points:
                     # Group key points by themes
-                    comparison_points = [point for point in all_key_points if any(word in point.lower() for word in ['compare', 'versus', 'vs', 'than', 'while', 'whereas'])]
-                    data_points = [point for point in all_key_points if any(word in point.lower() for word in ['%', 'percent', 'million', 'billion', 'number', 'rank', 'top', 'first', 'second', 'third'])]
-                    trend_points = [point for point in all_key_points if any(word in point.lower() for word in ['trend', 'growth', 'increase', 'decrease', 'rise', 'fall', 'emerging', 'growing'])]
+                    comparison_points, data_points, trend_points, remaining_points = [], [], [], []
+                    for point in all_key_points:
+                        is_comparison = bool(COMPARISON_POINT_RE.search(point))
+                        is_data = bool(DATA_POINT_RE.search(point))
+                        is_trend = bool(TREND_POINT_RE.search(point))
+                        if is_comparison:
+                            comparison_points.append(point)
+                        if is_data:
+                            data_points.append(point)
+                        if is_trend:
+                            trend_points.append(point)
+                        if not (is_comparison or is_data or is_trend):
+                            remaining_points.append(point)
+                        # Only the first few points of each theme are quoted, so large
+                        # aggregated summary sets can stop scanning once every theme is full
+                        if all(
+                            len(points) >= FALLBACK_POINTS_PER_THEME
+                            for points in (comparison_points, data_points, trend_points, remaining_points)
+                        ):
+                            break
                     
                     if comparison_points:
-                        synthesis_parts.append(f"Comparative analysis reveals: {', '.join(comparison_points[:3])}.")
+                        synthesis_parts.append(f"Comparative analysis reveals: {', '.join(comparison_points[:FALLBACK_POINTS_PER_THEME])}.")
                     
                     if data_points:
-                        synthesis_parts.append(f"Key data points include: {', '.join(data_points[:3])}.")
+                        synthesis_parts.append(f"Key data points include: {', '.join(data_points[:FALLBACK_POINTS_PER_THEME])}.")
                     
                     if trend_points:
-                        synthesis_parts.append(f"Emerging trends identified: {', '.join(trend_points[:3])}.")
+                        synthesis_parts.append(f"Emerging trends identified: {', '.join(trend_points[:FALLBACK_POINTS_PER_THEME])}.")
                     
                     # Add remaining key points
-                    remaining_points = [point for point in all_key_points if point not in comparison_points + data_points + trend_points]
                     if remaining_points:
-                        synthesis_parts.append(f"Additional findings include: {', '.join(remaining_points[:3])}.")
+                        synthesis_parts.append(f"Additional findings include: {', '.join(remaining_points[:FALLBACK_POINTS_PER_THEME])}.")
                 
                 # Add strategic implications
                 synthesis_parts.append("The research demonstrates the complexity and multifaceted nature of this topic, with sources ranging from academic research to industry reports.")
@@ -555,27 +979,24 @@ def synthesizer(state: GraphState) -> Dict[str, Any]:
                 ]
                 synthesis = f"Comprehensive analysis of {state['topic']} based on {len(state['summaries'])} sources. The research covers key aspects and provides insights into the topic."
             
-            # Convert references to dict for serialization
-            ref_dicts = [ref.model_dump() for ref in references]
-            references = [SourceSummary(**ref_dict) for ref_dict in ref_dicts]
-            
-            final_brief = FinalBrief(
+            # Every field is built here from already-validated summaries, so skip
+            # re-validating the nested references. One timestamp serves both the
+            # field and the metadata
+            generated_at = datetime.now(timezone.utc)
+            final_brief = FinalBrief.model_construct(
                 topic=state['topic'],
                 executive_summary=executive_summary,
                 synthesis=synthesis,
                 key_insights=key_insights,
                 references=references,
                 context_used=state.get('context_summary'),
+                generated_at=generated_at,
                 metadata={
-                    "generated_at": datetime.utcnow().isoformat(),
+                    "generated_at": generated_at.isoformat(timespec="seconds"),
                     "source_count": len(state['summaries']) if state['summaries'] else 0
                 }
             )
         
-        # Convert to dict for serialization
-        final_dict = final_brief.model_dump()
-        final_brief = FinalBrief(**final_dict)
-        
         logger.info("Final synthesis completed successfully")
         return {"final_brief": final_brief}
         
@@ -584,6 +1005,28 @@ def synthesizer(state: GraphState) -> Dict[str, Any]:
         return {"error": f"Final synthesis failed: {str(e)}"}
 
 
+# Error brief parts are validated once at import; error_handler only copies them
+_ERROR_REFERENCE = SourceSummary(
+    url="https://error.example.com",
+    title="Error in Research Generation",
+    summary="An error occurred during research generation",
+    relevance_score=0.0,
+    key_points=["Error occurred during research generation"],
+    source_type="error",
+    publication_date=None,
+    author=None
+)
+
+_ERROR_BRIEF_TEMPLATE = FinalBrief(
+    topic="",
+    executive_summary="Error generating research brief. Please try again with a different topic or check your API configuration.",
+    synthesis="Unable to complete research due to errors. The system encountered issues while processing your request. This could be due to API configuration problems, network issues, or invalid search queries.",
+    key_insights=["Error occurred during research generation", "Please check API configuration", "Try with a different topic"],
+    references=[_ERROR_REFERENCE],
+    metadata={}
+)
+
+
 def error_handler(state: GraphState) -> Dict[str, Any]:
     """
     Handle errors in the graph execution.
@@ -595,36 +1038,22 @@ def error_handler(state: GraphState) -> Dict[str, Any]:
         logger.error(f"Graph execution error: {error}")
         
         # Create a minimal valid reference to satisfy schema requirements
-        error_reference = SourceSummary(
-            url="https://error.example.com",
-            title="Error in Research Generation",
-            summary=f"An error occurred during research generation: {error}",
-            relevance_score=0.0,
-            key_points=["Error occurred during research generation"],
-            source_type="error",
-            publication_date=None,
-            author=None
-        )
-        
-        # Convert to dict for serialization
-        error_ref_dict = error_reference.model_dump()
-        error_reference = SourceSummary(**error_ref_dict)
-        
-        final_brief = FinalBrief(
-            topic=state['topic'],
-            executive_summary=f"Error generating research brief: {error}. Please try again with a different topic or check your API configuration.",
-            synthesis="Unable to complete research due to errors. The system encountered issues while processing your request. This could be due to API configuration problems, network issues, or invalid search queries.",
-            key_insights=["Error occurred during research generation", "Please check API configuration", "Try with a different topic"],
-            references=[error_reference],
-            metadata={"error": error}
-        )
-        
-        # Convert to dict for serialization
-        final_dict = final_brief.model_dump()
-        final_brief = FinalBrief(**final_dict)
+        error_reference = _ERROR_REFERENCE.model_copy(update={
+            "summary": f"An error occurred during research generation: {error}",
+            "key_points": list(_ERROR_REFERENCE.key_points)
+        })
+        
+        final_brief = _ERROR_BRIEF_TEMPLATE.model_copy(update={
+            "topic": state['topic'],
+            "executive_summary": f"Error generating research brief: {error}. Please try again with a different topic or check your API configuration.",
+            "key_insights": list(_ERROR_BRIEF_TEMPLATE.key_insights),
+            "references": [error_reference],
+            "metadata": {"error": error},
+            "generated_at": datetime.now(timezone.utc)
+        })
         
         return {
             "final_brief": final_brief
         }
     
-    return {} 
\ No newline at end of file
+    return {}
\ No newline at end of file
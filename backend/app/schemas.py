@@ -2,10 +2,11 @@
 Pydantic schemas for structured outputs throughout the research brief generation process.
 """
 
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Literal, Optional, Dict, Any
+from datetime import datetime, timezone
 from enum import Enum
+from functools import cached_property
 
 
 class ResearchDepth(str, Enum):
@@ -15,8 +16,15 @@ class ResearchDepth(str, Enum):
     DEEP = "deep"  # 8-12 sources
 
 
+# Research artifacts are immutable once produced: nodes hand the same instances to
+# later nodes, caches and storage, and derive variants with model_copy instead
+ARTIFACT_MODEL_CONFIG = ConfigDict(frozen=True, extra="ignore", revalidate_instances="never")
+
+
 class ResearchPlan(BaseModel):
     """The structured plan for conducting research."""
+    model_config = ARTIFACT_MODEL_CONFIG
+    
     queries: List[str] = Field(
         description="Comprehensive list of search engine queries to answer the user's topic",
         min_length=1
@@ -36,6 +44,8 @@ class ResearchPlan(BaseModel):
 
 class SourceSummary(BaseModel):
     """A structured summary of a single data source."""
+    model_config = ARTIFACT_MODEL_CONFIG
+    
     url: str = Field(description="URL of the source")
     title: str = Field(description="Title of the source")
     summary: str = Field(
@@ -54,8 +64,17 @@ class SourceSummary(BaseModel):
     author: Optional[str] = Field(description="Author or organization if available")
 
 
+class SourceSummaryBatch(BaseModel):
+    """Summaries for a group of sources produced in a single LLM call."""
+    summaries: List[SourceSummary] = Field(
+        description="One summary per source, in the order the sources were given"
+    )
+
+
 class ContextSummary(BaseModel):
     """Summary of prior user interactions for context."""
+    model_config = ARTIFACT_MODEL_CONFIG
+    
     previous_topics: List[str] = Field(description="Topics from previous briefs")
     key_findings: List[str] = Field(description="Key findings from previous research")
     user_preferences: Dict[str, Any] = Field(
@@ -65,10 +84,29 @@ class ContextSummary(BaseModel):
     continuity_notes: str = Field(
         description="Notes on how this new research relates to previous work"
     )
+    
+    @cached_property
+    def as_prompt_text(self) -> str:
+        """Render the summary once for the planning and synthesis prompts."""
+        return (
+            f"Previous topics: {', '.join(self.previous_topics)}\n"
+            f"Key findings: {', '.join(self.key_findings)}"
+        )
+
+
+class PlanWithContext(BaseModel):
+    """Context summary and research plan produced together in a single LLM call."""
+    context: Optional[ContextSummary] = Field(
+        default=None,
+        description="Summary of prior user interactions relevant to the new topic"
+    )
+    plan: ResearchPlan = Field(description="The research plan for the new topic")
 
 
 class FinalBrief(BaseModel):
     """The final, compiled research brief."""
+    model_config = ARTIFACT_MODEL_CONFIG
+    
     topic: str = Field(description="The original research topic")
     executive_summary: str = Field(
         description="A high-level summary of the research findings",
@@ -91,7 +129,7 @@ class FinalBrief(BaseModel):
         description="Additional metadata about the brief generation",
         default_factory=dict
     )
-    generated_at: datetime = Field(default_factory=datetime.utcnow)
+    generated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 
 class BriefRequest(BaseModel):
@@ -100,8 +138,10 @@ class BriefRequest(BaseModel):
         description="The research topic",
         min_length=5
     )
-    depth: ResearchDepth = Field(
-        default=ResearchDepth.MODERATE,
+    # Validated as a Literal, which pydantic-core matches as a plain string instead of
+    # running enum coercion; ResearchDepth members still compare equal to these values
+    depth: Literal["shallow", "moderate", "deep"] = Field(
+        default=ResearchDepth.MODERATE.value,
         description="Research depth level"
     )
     follow_up: bool = Field(
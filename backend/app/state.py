@@ -2,10 +2,15 @@
 Graph state definition for the research brief generator.
 """
 
-from typing import List, TypedDict, Optional, Dict, Any
+from typing import Annotated, List, TypedDict, Optional, Dict, Any
 from app.schemas import ResearchPlan, SourceSummary, FinalBrief, ContextSummary
 
 
+def keep_first_error(current: Optional[str], update: Optional[str]) -> Optional[str]:
+    """Reducer keeping the earliest error when parallel nodes both report one."""
+    return current or update
+
+
 class GraphState(TypedDict):
     """
     Represents the state of our research brief generation graph.
@@ -22,6 +27,7 @@ class GraphState(TypedDict):
     
     # User history and context
     history: List[FinalBrief]
+    history_context: Optional[str]  # History text rendered by the planner, reused by context_summarizer
     context_summary: Optional[ContextSummary]
     
     # Research planning
@@ -38,7 +44,7 @@ class GraphState(TypedDict):
     final_brief: Optional[FinalBrief]
     
     # Error handling
-    error: Optional[str]
+    error: Annotated[Optional[str], keep_first_error]
     
     # Metadata for monitoring
     execution_metadata: Dict[str, Any] 
\ No newline at end of file
@@ -2,98 +2,462 @@
 Storage and history management for the research brief generator.
 """
 
-import json
 import logging
-from typing import List, Optional, Dict, Any
-from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from datetime import datetime, timezone
 import sqlite3
+import orjson
+import zstandard
 import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
 
-from app.schemas import FinalBrief, BriefRequest
+from app.schemas import FinalBrief, BriefRequest, SourceSummary, ContextSummary
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Brief payloads are stored as zstd-compressed JSON. The compressor is reused across
+# writes and only touched under the write lock; (de)compressors are not safe for
+# concurrent use, so each reader thread keeps its own decompressor
+_brief_compressor = zstandard.ZstdCompressor(level=3)
+_thread_local = threading.local()
+
+# Entries kept in each of the history and brief read caches
+READ_CACHE_MAX_ENTRIES = 512
+
+# Bumped whenever the DDL in _init_database changes; stored in PRAGMA user_version
+SCHEMA_VERSION = 3
+
+# Prepared statements kept per connection; sized to hold every statement below
+SQL_STATEMENT_CACHE_SIZE = 256
+
+# Statements run on every request, shared so each is parsed once per connection
+_SQL_UPSERT_USER = """
+    INSERT INTO users (user_id) VALUES (?)
+    ON CONFLICT (user_id) DO UPDATE SET last_activity = CURRENT_TIMESTAMP
+"""
+_SQL_INSERT_BRIEF = """
+    INSERT INTO briefs (user_id, topic, depth, is_follow_up, brief_data)
+    VALUES (?, ?, ?, ?, ?)
+"""
+_SQL_INSERT_CONVERSATION = """
+    INSERT INTO conversations (user_id, user_input, bot_response, interaction_type)
+    VALUES (?, ?, ?, ?)
+"""
+_SQL_SELECT_USER_BRIEFS = """
+    SELECT id, brief_data, created_at FROM briefs
+    WHERE user_id = ?
+    ORDER BY created_at DESC
+    LIMIT ?
+"""
+_SQL_SELECT_CONVERSATIONS = """
+    SELECT user_input, bot_response, interaction_type, created_at
+    FROM conversations
+    WHERE user_id = ?
+    ORDER BY created_at DESC
+    LIMIT ?
+"""
+_SQL_INSERT_BRIEF_SOURCE = """
+    INSERT INTO brief_sources (brief_id, url, title, relevance_score)
+    VALUES (?, ?, ?, ?)
+"""
+_SQL_SELECT_TOP_SOURCES = """
+    SELECT url, title, relevance_score FROM brief_sources
+    WHERE brief_id = ?
+    ORDER BY relevance_score DESC
+    LIMIT ?
+"""
+_SQL_SELECT_BRIEF = "SELECT brief_data FROM briefs WHERE id = ?"
+_SQL_CREATE_BRIEFS_CREATED_INDEX = """
+    CREATE INDEX IF NOT EXISTS idx_briefs_created_at
+    ON briefs (created_at)
+"""
+
+# Full schema DDL, run as one script when PRAGMA user_version is behind.
+# History queries filter by user and read newest first, so the composite indexes
+# serve them without a separate sort; they also cover plain user_id lookups,
+# replacing the old single-column ones. brief_sources copies each brief's
+# reference scores so top-scored sources can be read without loading the brief
+_SCHEMA_SQL = f"""
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS users (
+    user_id TEXT PRIMARY KEY,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS briefs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    topic TEXT NOT NULL,
+    depth TEXT NOT NULL,
+    is_follow_up BOOLEAN NOT NULL,
+    brief_data BLOB NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (user_id)
+);
+
+CREATE TABLE IF NOT EXISTS brief_sources (
+    brief_id INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    title TEXT NOT NULL,
+    relevance_score REAL NOT NULL,
+    FOREIGN KEY (brief_id) REFERENCES briefs (id)
+);
+
+CREATE TABLE IF NOT EXISTS conversations (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    user_id TEXT NOT NULL,
+    user_input TEXT NOT NULL,
+    bot_response TEXT NOT NULL,
+    interaction_type TEXT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES users (user_id)
+);
+
+DROP INDEX IF EXISTS idx_briefs_user_id;
+DROP INDEX IF EXISTS idx_conversations_user_id;
+CREATE INDEX IF NOT EXISTS idx_briefs_user_created ON briefs (user_id, created_at DESC);
+{_SQL_CREATE_BRIEFS_CREATED_INDEX.strip()};
+CREATE INDEX IF NOT EXISTS idx_brief_sources_brief_score ON brief_sources (brief_id, relevance_score DESC);
+CREATE INDEX IF NOT EXISTS idx_conversations_user_created ON conversations (user_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_conversations_created_at ON conversations (created_at);
+
+PRAGMA user_version = {SCHEMA_VERSION};
+
+COMMIT;
+"""
+
+# Deleting at least this many briefs, making up over half the table, drops the
+# created_at index and rebuilds it afterwards instead of updating it row by row
+BULK_DELETE_MIN_ROWS = 1000
+_SQL_UPDATE_BRIEF_DATA = "UPDATE briefs SET brief_data = ? WHERE id = ?"
+
+
+def _decompress_brief(brief_data: bytes) -> bytes:
+    """
+    Decompress a stored brief payload with this thread's decompressor.
+    
+    Args:
+        brief_data: Compressed brief_data column value
+    
+    Returns:
+        Brief JSON as bytes
+    """
+    decompressor = getattr(_thread_local, "decompressor", None)
+    if decompressor is None:
+        decompressor = _thread_local.decompressor = zstandard.ZstdDecompressor()
+    return decompressor.decompress(brief_data)
+
+
+def _construct_brief(brief_data: bytes) -> FinalBrief:
+    """
+    Load a stored brief without re-validating it.
+    
+    Rows are written with model_dump_json after the brief was validated, so they
+    are trusted and can be rebuilt with model_construct.
+    
+    Args:
+        brief_data: Decompressed JSON written by save_brief
+    
+    Returns:
+        The stored brief
+    """
+    return _brief_from_dict(orjson.loads(brief_data))
+
+
+def _history_entry(brief_id: int, brief_json: bytes, created_at: str) -> Dict[str, Any]:
+    """
+    Build a get_user_history dict from a stored brief.
+    
+    Args:
+        brief_id: Row identifier
+        brief_json: Decompressed JSON written by save_brief
+        created_at: Row creation timestamp
+    
+    Returns:
+        The brief as a fresh dict, with its database ID and creation time
+    """
+    # Rows are written with model_dump_json, so they are already
+    # valid and can be loaded without a validate/dump round-trip
+    brief_dict = orjson.loads(brief_json)
+    
+    # Add the additional fields
+    brief_dict['id'] = brief_id
+    brief_dict['generated_at'] = created_at
+    return brief_dict
+
+
+def _brief_from_dict(brief_dict: Dict[str, Any]) -> FinalBrief:
+    """
+    Rebuild a FinalBrief from a stored brief dict without re-validating it.
+    
+    Args:
+        brief_dict: Parsed brief JSON, as returned by get_user_history
+    
+    Returns:
+        The stored brief
+    """
+    data = dict(brief_dict)
+    data['references'] = [SourceSummary.model_construct(**ref) for ref in data.get('references', [])]
+    if data.get('context_used'):
+        data['context_used'] = ContextSummary.model_construct(**data['context_used'])
+    if isinstance(data.get('generated_at'), str):
+        generated_at = datetime.fromisoformat(data['generated_at'])
+        # SQLite's CURRENT_TIMESTAMP is UTC but stored without an offset, so mark it
+        # as UTC to keep loaded briefs comparable with newly generated ones
+        if generated_at.tzinfo is None:
+            generated_at = generated_at.replace(tzinfo=timezone.utc)
+        data['generated_at'] = generated_at
+    return FinalBrief.model_construct(**data)
+
+
+class _ReadCache:
+    """
+    LRU cache with a time-to-live for storage reads.
+    
+    Writes through BriefStorage invalidate affected entries directly; the TTL
+    bounds staleness when another process writes to the same database. Reads run
+    outside the write lock, so each invalidation bumps a generation counter and
+    values read before it are not stored.
+    """
+    
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.generation = 0
+        self._entries: "OrderedDict[Any, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Any) -> Any:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, value = entry
+            if time.monotonic() - stored_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+    
+    def put(self, key: Any, value: Any, generation: Optional[int] = None) -> None:
+        """
+        Store a value, evicting the least recently used entry when full.
+        
+        Args:
+            key: Cache key
+            value: Value to store
+            generation: Generation read before the value was loaded; the value is
+                dropped if an invalidation happened since
+        """
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate(self, predicate: Callable[[Any], bool]) -> None:
+        """Drop every entry whose key matches the predicate."""
+        with self._lock:
+            self.generation += 1
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+    
+    def clear(self) -> None:
+        """Drop all entries."""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
 
 class BriefStorage:
     """Storage manager for research briefs and user history."""
     
     def __init__(self, db_path: str = None):
         self.db_path = db_path or settings.DATABASE_URL.replace("sqlite:///", "")
-        self._init_database()
+        # Writes go through one connection under the lock; reads check out one
+        # of up to read_pool_size read-only connections, which WAL lets run
+        # alongside the writer
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self.read_pool_size = max(1, settings.STORAGE_READ_CONNECTIONS)
+        self._read_pool: "queue.Queue[sqlite3.Connection]" = queue.Queue()
+        self._read_conns: List[sqlite3.Connection] = []
+        self._read_lock = threading.Lock()
+        # Keyed by (user_id, limit) and by brief ID respectively
+        self._history_cache = _ReadCache(READ_CACHE_MAX_ENTRIES, settings.STORAGE_CACHE_TTL_SECONDS)
+        self._brief_cache = _ReadCache(READ_CACHE_MAX_ENTRIES, settings.STORAGE_CACHE_TTL_SECONDS)
+        # The database is opened on first use, so importing this module doesn't touch disk
     
-    def _init_database(self):
-        """Initialize the database with required tables."""
+    def _init_database(self) -> sqlite3.Connection:
+        """
+        Open the write connection and create the schema if it is out of date.
+        
+        Called with the connection lock held.
+        
+        Returns:
+            The open connection
+        """
         try:
             # Ensure directory exists
             db_dir = Path(self.db_path).parent
             db_dir.mkdir(parents=True, exist_ok=True)
             
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Create users table
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS users (
-                        user_id TEXT PRIMARY KEY,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                    )
-                """)
-                
-                # Create briefs table
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS briefs (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id TEXT NOT NULL,
-                        topic TEXT NOT NULL,
-                        depth TEXT NOT NULL,
-                        is_follow_up BOOLEAN NOT NULL,
-                        brief_data TEXT NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (user_id) REFERENCES users (user_id)
-                    )
-                """)
-                
-                # Create conversations table
-                cursor.execute("""
-                    CREATE TABLE IF NOT EXISTS conversations (
-                        id INTEGER PRIMARY KEY AUTOINCREMENT,
-                        user_id TEXT NOT NULL,
-                        user_input TEXT NOT NULL,
-                        bot_response TEXT NOT NULL,
-                        interaction_type TEXT NOT NULL,
-                        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                        FOREIGN KEY (user_id) REFERENCES users (user_id)
-                    )
-                """)
-                
-                # Create indexes
-                cursor.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_briefs_user_id 
-                    ON briefs (user_id)
-                """)
-                cursor.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_briefs_created_at 
-                    ON briefs (created_at)
-                """)
-                cursor.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_conversations_user_id 
-                    ON conversations (user_id)
-                """)
-                cursor.execute("""
-                    CREATE INDEX IF NOT EXISTS idx_conversations_created_at 
-                    ON conversations (created_at)
-                """)
-                
-                conn.commit()
-                logger.info("Database initialized successfully")
+            # One connection is reused for every write; API handlers run on
+            # worker threads, so access is serialized by the lock instead
+            conn = sqlite3.connect(
+                self.db_path,
+                check_same_thread=False,
+                cached_statements=SQL_STATEMENT_CACHE_SIZE
+            )
+            
+            # WAL lets readers run alongside a writer, and with synchronous=NORMAL
+            # commits no longer fsync the database file each time
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA mmap_size=268435456")
+            conn.execute("PRAGMA cache_size=-65536")
+            
+            # Databases already at the current schema skip the DDL entirely
+            if conn.execute("PRAGMA user_version").fetchone()[0] >= SCHEMA_VERSION:
+                return conn
+            
+            # One script creates or upgrades the schema in a single transaction
+            conn.executescript(_SCHEMA_SQL)
+            
+            logger.info("Database initialized successfully")
+            return conn
                 
         except Exception as e:
             logger.error(f"Error initializing database: {e}")
             raise
     
+    @contextmanager
+    def _connection(self):
+        """
+        Run a block on the write connection, committing on success and rolling back on error.
+        
+        Yields:
+            The shared SQLite write connection
+        """
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._init_database()
+            with self._conn:
+                yield self._conn
+    
+    def _open_reader(self) -> sqlite3.Connection:
+        """
+        Open a read-only connection to the database.
+        
+        Returns:
+            The new connection
+        """
+        conn = sqlite3.connect(
+            f"{Path(self.db_path).resolve().as_uri()}?mode=ro",
+            uri=True,
+            check_same_thread=False,
+            cached_statements=SQL_STATEMENT_CACHE_SIZE
+        )
+        conn.execute("PRAGMA temp_store=MEMORY")
+        conn.execute("PRAGMA mmap_size=268435456")
+        conn.execute("PRAGMA cache_size=-65536")
+        return conn
+    
+    @contextmanager
+    def _read_connection(self):
+        """
+        Check out a read-only connection for the duration of a block.
+        
+        Yields:
+            A read-only SQLite connection
+        """
+        if self._conn is None:
+            # The write connection creates the database and schema
+            with self._connection():
+                pass
+        
+        try:
+            conn = self._read_pool.get_nowait()
+        except queue.Empty:
+            with self._read_lock:
+                conn = None
+                if len(self._read_conns) < self.read_pool_size:
+                    conn = self._open_reader()
+                    self._read_conns.append(conn)
+            if conn is None:
+                conn = self._read_pool.get()
+        
+        try:
+            yield conn
+        finally:
+            self._read_pool.put(conn)
+    
+    def _load_brief_data(self, brief_id: int, brief_data: Any, legacy_rows: List[Tuple[bytes, int]]) -> bytes:
+        """
+        Decompress a stored brief payload, queueing legacy JSON rows for compression.
+        
+        Args:
+            brief_id: Row identifier
+            brief_data: Raw brief_data column value
+            legacy_rows: Collects (brief JSON, row ID) pairs to pass to _compress_legacy_rows
+        
+        Returns:
+            Brief JSON as bytes
+        """
+        if isinstance(brief_data, bytes):
+            return _decompress_brief(brief_data)
+        
+        # Rows written before compression hold plain JSON text
+        brief_json = brief_data.encode("utf-8")
+        legacy_rows.append((brief_json, brief_id))
+        return brief_json
+    
+    def _compress_legacy_rows(self, legacy_rows: List[Tuple[bytes, int]]) -> None:
+        """
+        Rewrite uncompressed legacy rows found by a read.
+        
+        Args:
+            legacy_rows: (brief JSON, row ID) pairs from _load_brief_data
+        """
+        if not legacy_rows:
+            return
+        
+        try:
+            with self._connection() as conn:
+                conn.executemany(_SQL_UPDATE_BRIEF_DATA, [
+                    (_brief_compressor.compress(brief_json), brief_id)
+                    for brief_json, brief_id in legacy_rows
+                ])
+        except Exception as e:
+            logger.error(f"Error compressing legacy briefs: {e}")
+    
+    def close(self) -> None:
+        """Close the write connection and every read connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        
+        with self._read_lock:
+            for conn in self._read_conns:
+                conn.close()
+            self._read_conns = []
+            self._read_pool = queue.Queue()
+    
     def save_brief(self, user_id: str, request: BriefRequest, brief: FinalBrief) -> bool:
         """
         Save a research brief to storage.
@@ -106,37 +470,55 @@ class BriefStorage:
         Returns:
             True if saved successfully
         """
+        return self.save_briefs_bulk([(user_id, request, brief)])
+    
+    def save_briefs_bulk(self, items: List[Tuple[str, BriefRequest, FinalBrief]]) -> bool:
+        """
+        Save several research briefs in a single transaction.
+        
+        Args:
+            items: (user_id, request, brief) tuples to save
+        
+        Returns:
+            True if all briefs were saved
+        """
+        if not items:
+            return True
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            # Serialize before taking the connection lock. Briefs are immutable, so a
+            # brief repeated across the batch is serialized and compressed only once
+            user_ids = [(user_id,) for user_id in dict.fromkeys(user_id for user_id, _, _ in items)]
+            unique_briefs = {id(brief): brief for _, _, brief in items}
+            briefs_json = {key: brief.model_dump_json().encode("utf-8") for key, brief in unique_briefs.items()}
+            
+            with self._connection() as conn:
                 cursor = conn.cursor()
-                
-                # Ensure user exists
-                cursor.execute("""
-                    INSERT OR IGNORE INTO users (user_id) VALUES (?)
-                """, (user_id,))
-                
-                # Update user activity
-                cursor.execute("""
-                    UPDATE users SET last_activity = CURRENT_TIMESTAMP 
-                    WHERE user_id = ?
-                """, (user_id,))
-                
-                # Save brief
-                brief_data = brief.model_dump_json()
-                cursor.execute("""
-                    INSERT INTO briefs (user_id, topic, depth, is_follow_up, brief_data)
-                    VALUES (?, ?, ?, ?, ?)
-                """, (
-                    user_id,
-                    request.topic,
-                    request.depth.value,
-                    request.follow_up,
-                    brief_data
-                ))
-                
-                conn.commit()
-                logger.info(f"Brief saved for user {user_id}")
-                return True
+                payloads = {key: _brief_compressor.compress(brief_json) for key, brief_json in briefs_json.items()}
+                rows = [
+                    (user_id, request.topic, request.depth, request.follow_up, payloads[id(brief)])
+                    for user_id, request, brief in items
+                ]
+                
+                # Create users or update their activity in one statement
+                cursor.executemany(_SQL_UPSERT_USER, user_ids)
+                
+                # Save briefs one statement at a time to get each row ID for its sources
+                source_rows: List[Tuple[Optional[int], str, str, float]] = []
+                for row, (_, _, brief) in zip(rows, items):
+                    cursor.execute(_SQL_INSERT_BRIEF, row)
+                    brief_id = cursor.lastrowid
+                    source_rows.extend(
+                        (brief_id, source.url, source.title, source.relevance_score)
+                        for source in brief.references
+                    )
+                cursor.executemany(_SQL_INSERT_BRIEF_SOURCE, source_rows)
+            
+            # Invalidate after the commit so readers can't cache the old rows again
+            saved_users = {user_id for user_id, in user_ids}
+            self._history_cache.invalidate(lambda key: key[0] in saved_users)
+            logger.debug("Saved %d briefs for %d users", len(rows), len(user_ids))
+            return True
                 
         except Exception as e:
             logger.error(f"Error saving brief: {e}")
@@ -151,45 +533,56 @@ class BriefStorage:
             limit: Maximum number of briefs to return
             
         Returns:
-            List of previous briefs with database IDs
+            List of previous briefs as plain dicts with database IDs, ready to
+            serialize; use get_user_briefs for FinalBrief models
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    SELECT id, brief_data, created_at FROM briefs 
-                    WHERE user_id = ? 
-                    ORDER BY created_at DESC 
-                    LIMIT ?
-                """, (user_id, limit))
-                
-                results = cursor.fetchall()
+            # The cache holds immutable (ID, JSON, created_at) tuples, and every read
+            # parses fresh dicts, so callers can't modify the cached entries
+            cached = self._history_cache.get((user_id, limit))
+            if cached is not None:
+                return [_history_entry(*entry) for entry in cached]
+            
+            generation = self._history_cache.generation
+            legacy_rows: List[Tuple[bytes, int]] = []
+            with self._read_connection() as conn:
+                rows = conn.execute(_SQL_SELECT_USER_BRIEFS, (user_id, limit))
+                entries = []
                 briefs = []
                 
-                for row in results:
+                # Parse rows as SQLite steps through them instead of materializing them first
+                for row in rows:
                     try:
                         brief_id, brief_data, created_at = row
-                        brief_obj = json.loads(brief_data)
-                        brief = FinalBrief.model_validate(brief_obj)
-                        
-                        # Create a dict with the brief data and additional fields
-                        brief_dict = brief.model_dump()
-                        brief_dict['id'] = brief_id
-                        brief_dict['generated_at'] = created_at
-                        
-                        briefs.append(brief_dict)
+                        brief_json = self._load_brief_data(brief_id, brief_data, legacy_rows)
+                        briefs.append(_history_entry(brief_id, brief_json, created_at))
+                        entries.append((brief_id, brief_json, created_at))
                     except Exception as e:
                         logger.error(f"Error parsing brief data: {e}")
                         continue
                 
-                logger.info(f"Retrieved {len(briefs)} briefs for user {user_id}")
-                return briefs
+            self._compress_legacy_rows(legacy_rows)
+            logger.debug("Retrieved %d briefs for user %s", len(briefs), user_id)
+            self._history_cache.put((user_id, limit), tuple(entries), generation)
+            return briefs
                 
         except Exception as e:
             logger.error(f"Error retrieving user history: {e}")
             return []
     
+    def get_user_briefs(self, user_id: str, limit: int = 10) -> List[FinalBrief]:
+        """
+        Get user's research history as FinalBrief models.
+        
+        Args:
+            user_id: User identifier
+            limit: Maximum number of briefs to return
+        
+        Returns:
+            List of previous briefs, most recent first
+        """
+        return [_brief_from_dict(brief_dict) for brief_dict in self.get_user_history(user_id, limit)]
+    
     def save_conversation(self, user_id: str, user_input: str, bot_response: str, interaction_type: str = "chat") -> bool:
         """
         Save a conversation interaction to storage.
@@ -203,24 +596,35 @@ class BriefStorage:
         Returns:
             True if saved successfully
         """
+        return self.save_conversations_bulk([(user_id, user_input, bot_response, interaction_type)])
+    
+    def save_conversations_bulk(self, items: List[Tuple[str, str, str, str]]) -> bool:
+        """
+        Save several conversation interactions in a single transaction.
+        
+        Args:
+            items: (user_id, user_input, bot_response, interaction_type) tuples to save
+        
+        Returns:
+            True if all interactions were saved
+        """
+        if not items:
+            return True
+        
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            user_ids = [(user_id,) for user_id in dict.fromkeys(item[0] for item in items)]
+            
+            with self._connection() as conn:
                 cursor = conn.cursor()
                 
-                # Ensure user exists
-                cursor.execute("""
-                    INSERT OR IGNORE INTO users (user_id) VALUES (?)
-                """, (user_id,))
-                
-                # Save conversation
-                cursor.execute("""
-                    INSERT INTO conversations (user_id, user_input, bot_response, interaction_type)
-                    VALUES (?, ?, ?, ?)
-                """, (user_id, user_input, bot_response, interaction_type))
+                # Create users or update their activity in one statement
+                cursor.executemany(_SQL_UPSERT_USER, user_ids)
                 
-                conn.commit()
-                logger.info(f"Conversation saved for user {user_id}")
-                return True
+                # Save conversations
+                cursor.executemany(_SQL_INSERT_CONVERSATION, items)
+            
+            logger.debug("Saved %d conversation interactions for %d users", len(items), len(user_ids))
+            return True
                 
         except Exception as e:
             logger.error(f"Error saving conversation: {e}")
@@ -238,16 +642,10 @@ class BriefStorage:
             List of conversation interactions
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._read_connection() as conn:
                 cursor = conn.cursor()
                 
-                cursor.execute("""
-                    SELECT user_input, bot_response, interaction_type, created_at 
-                    FROM conversations 
-                    WHERE user_id = ? 
-                    ORDER BY created_at DESC 
-                    LIMIT ?
-                """, (user_id, limit))
+                cursor.execute(_SQL_SELECT_CONVERSATIONS, (user_id, limit))
                 
                 results = cursor.fetchall()
                 conversations = []
@@ -260,7 +658,7 @@ class BriefStorage:
                         "created_at": row[3]
                     })
                 
-                logger.info(f"Retrieved {len(conversations)} conversations for user {user_id}")
+                logger.debug("Retrieved %d conversations for user %s", len(conversations), user_id)
                 return conversations
                 
         except Exception as e:
@@ -278,24 +676,63 @@ class BriefStorage:
             Brief if found, None otherwise
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    SELECT brief_data FROM briefs WHERE id = ?
-                """, (brief_id,))
-                
-                result = cursor.fetchone()
-                if result:
-                    brief_data = json.loads(result[0])
-                    return FinalBrief.model_validate(brief_data)
-                
-                return None
+            # FinalBrief is frozen, so cached briefs are shared with callers as-is
+            cached = self._brief_cache.get(brief_id)
+            if cached is not None:
+                return cached
+            
+            generation = self._brief_cache.generation
+            with self._read_connection() as conn:
+                result = conn.execute(_SQL_SELECT_BRIEF, (brief_id,)).fetchone()
+            
+            if result:
+                legacy_rows: List[Tuple[bytes, int]] = []
+                brief = _construct_brief(self._load_brief_data(brief_id, result[0], legacy_rows))
+                self._compress_legacy_rows(legacy_rows)
+                self._brief_cache.put(brief_id, brief, generation)
+                return brief
+            
+            return None
                 
         except Exception as e:
             logger.error(f"Error retrieving brief {brief_id}: {e}")
             return None
     
+    def get_top_sources(self, brief_id: int, k: int = 5) -> List[Dict[str, Any]]:
+        """
+        Get a brief's highest-scored sources without loading the brief.
+        
+        Args:
+            brief_id: Brief identifier
+            k: Maximum number of sources to return
+        
+        Returns:
+            Sources as dicts with url, title and relevance_score, best first
+        """
+        try:
+            with self._read_connection() as conn:
+                rows = conn.execute(_SQL_SELECT_TOP_SOURCES, (brief_id, k)).fetchall()
+            
+            if rows:
+                return [
+                    {"url": url, "title": title, "relevance_score": relevance_score}
+                    for url, title, relevance_score in rows
+                ]
+            
+            # Briefs saved before brief_sources existed only have the full payload
+            brief = self.get_brief_by_id(brief_id)
+            if brief is None:
+                return []
+            references = sorted(brief.references, key=lambda source: source.relevance_score, reverse=True)
+            return [
+                {"url": source.url, "title": source.title, "relevance_score": source.relevance_score}
+                for source in references[:k]
+            ]
+        
+        except Exception as e:
+            logger.error(f"Error retrieving top sources for brief {brief_id}: {e}")
+            return []
+    
     def delete_user_briefs(self, user_id: str) -> bool:
         """
         Delete all briefs for a user.
@@ -307,19 +744,42 @@ class BriefStorage:
             True if deleted successfully
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._connection() as conn:
                 cursor = conn.cursor()
+                # Take the write lock up front so the counts below stay accurate
+                cursor.execute("BEGIN IMMEDIATE")
+                
+                user_rows = cursor.execute("SELECT COUNT(*) FROM briefs WHERE user_id = ?", (user_id,)).fetchone()[0]
+                total_rows = cursor.execute("SELECT COUNT(*) FROM briefs").fetchone()[0]
+                # Rebuilding the index costs a pass over the remaining rows, so it
+                # only pays off when most of the table is being deleted. The
+                # (user_id, created_at) index is kept, since the delete uses it
+                rebuild_index = user_rows >= BULK_DELETE_MIN_ROWS and user_rows * 2 > total_rows
+                if rebuild_index:
+                    cursor.execute("DROP INDEX IF EXISTS idx_briefs_created_at")
                 
+                cursor.execute("""
+                    DELETE FROM brief_sources
+                    WHERE brief_id IN (SELECT id FROM briefs WHERE user_id = ?)
+                """, (user_id,))
                 cursor.execute("""
                     DELETE FROM briefs WHERE user_id = ?
                 """, (user_id,))
                 
+                if rebuild_index:
+                    cursor.execute(_SQL_CREATE_BRIEFS_CREATED_INDEX)
+                
                 cursor.execute("""
                     DELETE FROM users WHERE user_id = ?
                 """, (user_id,))
                 
                 conn.commit()
-                logger.info(f"Deleted all briefs for user {user_id}")
+                
+                # Invalidate after the commit so readers can't cache the old rows
+                # again; cached briefs aren't indexed by user, and deletes are rare
+                self._history_cache.invalidate(lambda key: key[0] == user_id)
+                self._brief_cache.clear()
+                logger.info("Deleted all briefs for user %s", user_id)
                 return True
                 
         except Exception as e:
@@ -337,7 +797,7 @@ class BriefStorage:
             Dictionary with user statistics
         """
         try:
-            with sqlite3.connect(self.db_path) as conn:
+            with self._read_connection() as conn:
                 cursor = conn.cursor()
                 
                 # Get total briefs
@@ -4,28 +4,282 @@ Tools for search and web scraping functionality.
 
 import asyncio
 import aiohttp
-import requests
-from bs4 import BeautifulSoup
-from typing import List, Dict, Any, Optional
+import httpx
+from lxml import etree
+from lxml import html as lxml_html
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import functools
+import hashlib
 import logging
+import re
+import threading
+from collections import OrderedDict
 from urllib.parse import urljoin, urlparse
 import time
 
+from langchain_core.runnables import RunnableLambda
 from langchain_tavily import TavilySearch
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Pages are parsed with lxml directly, skipping BeautifulSoup's tree wrapping.
+# Text is re-encoded as UTF-8 before parsing because lxml rejects str input that
+# carries an XML encoding declaration. Comments and processing instructions never
+# contribute text, so the parser drops them instead of building nodes for them
+HTML_PARSER = lxml_html.HTMLParser(encoding="utf-8", remove_comments=True, remove_pis=True)
+
+# Elements whose text never belongs to the page content
+NON_CONTENT_TAGS = ("script", "style", "nav", "footer", "header")
+
+# Raw page text scanned per MAX_CONTENT_LENGTH character kept. Extracted text is
+# mostly indentation and line breaks around short runs of words, so collapsing
+# twice the limit nearly always fills it, and the rest of a long page is skipped
+RAW_TEXT_SCAN_FACTOR = 2
+
+# Matches <div> elements with a "content" class token
+CONTENT_DIV_XPATH = etree.XPath(
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' content ')]"
+)
+
+# Connection pool limits for the shared HTTP clients. The per-host cap keeps a
+# burst of results from one site from monopolizing the aiohttp pool, and resolved
+# hosts are cached so repeat fetches skip DNS
+HTTP_POOL_LIMIT = 100
+HTTP_KEEPALIVE_LIMIT = 20
+HTTP_POOL_LIMIT_PER_HOST = 10
+DNS_CACHE_TTL_SECONDS = 300
+
+# URLs embedded in plain-text search responses
+URL_PATTERN = re.compile(r'https?://[^\s<>"]+')
+
+# Only web pages are fetched; this also rules out javascript:, data:, file: and ftp: URLs
+ALLOWED_URL_SCHEMES = frozenset({'http', 'https'})
+
+# Distinct URLs whose validation result is remembered; URLs repeat across queries
+URL_VALIDATION_CACHE_SIZE = 4096
+
+# Bytes read per chunk while streaming page bodies
+DOWNLOAD_CHUNK_BYTES = 65536
+
+# Search results with this many words or fewer carry too little text to summarize
+MIN_RESULT_WORDS = 20
+
+# Pages remembered with their ETag/Last-Modified validators for conditional GETs
+PAGE_CACHE_MAX_ENTRIES = 256
+
+
+def _decode_html(body: bytearray, encoding: Optional[str]) -> str:
+    """
+    Decode a downloaded page body, truncated to MAX_HTML_BYTES.
+    
+    Args:
+        body: Raw bytes read from the response
+        encoding: Charset declared by the response, if any
+    
+    Returns:
+        Page HTML; bytes that don't decode, such as a character cut at the
+        limit, are replaced
+    """
+    return bytes(body[:settings.MAX_HTML_BYTES]).decode(encoding or "utf-8", errors="replace")
+
+
+def _placeholder_url(text: str) -> str:
+    """
+    Build a stable URL for a search result that came back as bare text.
+    
+    The URL is derived from the text, so the same result returned for several
+    queries deduplicates like any other URL.
+    
+    Args:
+        text: Result text
+    
+    Returns:
+        Placeholder URL on example.com
+    """
+    return f"https://search-result-{hashlib.blake2b(text.encode('utf-8'), digest_size=8).hexdigest()}.example.com"
+
+
+@functools.lru_cache(maxsize=URL_VALIDATION_CACHE_SIZE)
+def _is_valid_url(url: str) -> bool:
+    """
+    Check if URL is valid and safe to fetch.
+    
+    Args:
+        url: URL to validate
+    
+    Returns:
+        True if URL is valid and safe
+    """
+    try:
+        parsed = urlparse(url)
+        return parsed.scheme in ALLOWED_URL_SCHEMES and bool(parsed.netloc)
+    except Exception:
+        return False
+
+
+class TokenBucket:
+    """
+    Token-bucket rate limiter usable from both threads and coroutines.
+    
+    Bursts up to the bucket's capacity go through immediately; after that callers
+    are spaced out at the configured rate instead of sleeping a fixed interval.
+    """
+    
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        """
+        Initialize the limiter.
+        
+        Args:
+            rate: Tokens added per second; 0 disables limiting
+            capacity: Largest burst allowed; defaults to one second's worth of tokens
+        """
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def _reserve(self) -> float:
+        """
+        Take a token, borrowing against future refills if the bucket is empty.
+        
+        Returns:
+            Seconds the caller must wait before its token is available
+        """
+        if self.rate <= 0:
+            return 0.0
+        
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1
+            return max(0.0, -self._tokens / self.rate)
+    
+    def acquire(self) -> None:
+        """Block until a token is available."""
+        delay = self._reserve()
+        if delay:
+            time.sleep(delay)
+    
+    async def acquire_async(self) -> None:
+        """Wait without blocking the event loop until a token is available."""
+        delay = self._reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
 
 class WebScraper:
     """Web scraping utility for fetching content from URLs."""
     
     def __init__(self):
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
         self.timeout = settings.REQUEST_TIMEOUT
+        # HTTP/2 multiplexes requests to the same host over one connection
+        self.session = httpx.Client(
+            http2=True,
+            follow_redirects=True,
+            timeout=self.timeout,
+            headers={
+                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+            },
+            limits=httpx.Limits(
+                max_connections=HTTP_POOL_LIMIT,
+                max_keepalive_connections=HTTP_KEEPALIVE_LIMIT
+            )
+        )
+        self._async_session: Optional[aiohttp.ClientSession] = None
+        # url -> (etag, last_modified, extracted content), least recently used first
+        self._page_cache: "OrderedDict[str, Tuple[Optional[str], Optional[str], Dict[str, Any]]]" = OrderedDict()
+        self._page_cache_lock = threading.Lock()
+    
+    def _conditional_headers(self, url: str) -> Dict[str, str]:
+        """
+        Build revalidation headers for a previously fetched page.
+        
+        Args:
+            url: URL about to be fetched
+        
+        Returns:
+            If-None-Match/If-Modified-Since headers, empty if the page isn't cached
+        """
+        with self._page_cache_lock:
+            entry = self._page_cache.get(url)
+        if entry is None:
+            return {}
+        
+        etag, last_modified, _ = entry
+        headers = {}
+        if etag:
+            headers['If-None-Match'] = etag
+        if last_modified:
+            headers['If-Modified-Since'] = last_modified
+        return headers
+    
+    def _cached_page(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Return a copy of the cached content for a page the server reported unchanged.
+        
+        Args:
+            url: URL that returned 304 Not Modified
+        
+        Returns:
+            Cached content dictionary, or None if it was evicted meanwhile
+        """
+        with self._page_cache_lock:
+            entry = self._page_cache.get(url)
+            if entry is None:
+                return None
+            self._page_cache.move_to_end(url)
+        return dict(entry[2])
+    
+    def _remember_page(self, url: str, headers: Any, result: Dict[str, Any]) -> None:
+        """
+        Cache extracted content if the response carried a validator.
+        
+        Args:
+            url: Fetched URL
+            headers: Response headers
+            result: Content dictionary from extract_text_content
+        """
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not (etag or last_modified) or not result.get("word_count"):
+            return
+        
+        with self._page_cache_lock:
+            self._page_cache[url] = (etag, last_modified, dict(result))
+            self._page_cache.move_to_end(url)
+            while len(self._page_cache) > PAGE_CACHE_MAX_ENTRIES:
+                self._page_cache.popitem(last=False)
+    
+    def _get_async_session(self) -> aiohttp.ClientSession:
+        """
+        Return the shared aiohttp session, creating it on first use.
+        
+        Reusing one session keeps its connection pool warm across fetches
+        instead of paying a new TCP/TLS handshake for every URL.
+        
+        Returns:
+            Open aiohttp client session
+        """
+        if self._async_session is None or self._async_session.closed:
+            self._async_session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=HTTP_POOL_LIMIT,
+                    limit_per_host=HTTP_POOL_LIMIT_PER_HOST,
+                    ttl_dns_cache=DNS_CACHE_TTL_SECONDS
+                ),
+                headers=dict(self.session.headers),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._async_session
+    
+    async def aclose(self) -> None:
+        """Close the shared aiohttp session if one was opened."""
+        if self._async_session is not None and not self._async_session.closed:
+            await self._async_session.close()
+        self._async_session = None
     
     def extract_text_content(self, html_content: str, url: str) -> Dict[str, Any]:
         """
@@ -39,42 +293,49 @@ class WebScraper:
             Dictionary with extracted content and metadata
         """
         try:
-            soup = BeautifulSoup(html_content, 'html.parser')
+            doc = lxml_html.document_fromstring(html_content.encode("utf-8"), parser=HTML_PARSER)
             
-            # Remove script and style elements
-            for script in soup(["script", "style", "nav", "footer", "header"]):
-                script.decompose()
+            # Remove script and style elements, keeping the text that follows them
+            etree.strip_elements(doc, *NON_CONTENT_TAGS, with_tail=False)
             
             # Extract title
             title = ""
-            title_tag = soup.find('title')
-            if title_tag:
-                title = title_tag.get_text().strip()
+            title_tag = doc.find('.//title')
+            if title_tag is not None:
+                title = title_tag.text_content().strip()
             
             # Extract main content
             # Try to find main content area
-            main_content = soup.find('main') or soup.find('article') or soup.find('div', class_='content')
+            main_content = doc.find('.//main')
+            if main_content is None:
+                main_content = doc.find('.//article')
+            if main_content is None:
+                content_divs = CONTENT_DIV_XPATH(doc)
+                main_content = content_divs[0] if content_divs else None
             
-            if main_content:
-                text = main_content.get_text()
-            else:
+            if main_content is None:
                 # Fallback to body
-                text = soup.get_text()
+                main_content = doc.find('body')
+            if main_content is None:
+                main_content = doc
             
-            # Clean up text
-            lines = (line.strip() for line in text.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            text = ' '.join(chunk for chunk in chunks if chunk)
+            # Collapse whitespace, only over as much raw text as can still fill
+            # MAX_CONTENT_LENGTH once collapsed
+            raw_text = main_content.text_content()
+            scan_length = settings.MAX_CONTENT_LENGTH * RAW_TEXT_SCAN_FACTOR
+            text = ' '.join(raw_text[:scan_length].split())
             
             # Limit content length
-            if len(text) > settings.MAX_CONTENT_LENGTH:
+            if len(text) > settings.MAX_CONTENT_LENGTH or len(raw_text) > scan_length:
                 text = text[:settings.MAX_CONTENT_LENGTH] + "..."
             
             return {
                 "title": title,
                 "content": text,
                 "url": url,
-                "word_count": len(text.split()),
+                # Whitespace is already collapsed to single spaces, so counting them
+                # gives the word count without building a list of words
+                "word_count": text.count(' ') + 1 if text else 0,
                 "extracted_at": time.time()
             }
             
@@ -99,23 +360,41 @@ class WebScraper:
             Dictionary with content and metadata
         """
         try:
-            response = self.session.get(url, timeout=self.timeout)
-            response.raise_for_status()
-            
-            # Check content type
-            content_type = response.headers.get('content-type', '').lower()
-            if 'text/html' not in content_type:
-                return {
-                    "title": "",
-                    "content": f"Non-HTML content: {content_type}",
-                    "url": url,
-                    "word_count": 0,
-                    "extracted_at": time.time()
-                }
+            # Stream the body so oversized pages can be cut off mid-download
+            with self.session.stream("GET", url, headers=self._conditional_headers(url)) as response:
+                # The server confirmed the cached copy is still current
+                if response.status_code == 304:
+                    cached = self._cached_page(url)
+                    if cached is not None:
+                        return cached
+                
+                response.raise_for_status()
+                
+                # Check content type. Only the headers have been read at this point,
+                # and leaving the with-block closes the connection, so non-HTML
+                # bodies are never downloaded and no HEAD preflight is needed
+                content_type = response.headers.get('content-type', '').lower()
+                if 'text/html' not in content_type:
+                    return {
+                        "title": "",
+                        "content": f"Non-HTML content: {content_type}",
+                        "url": url,
+                        "word_count": 0,
+                        "extracted_at": time.time()
+                    }
+                
+                body = bytearray()
+                for chunk in response.iter_bytes(DOWNLOAD_CHUNK_BYTES):
+                    body += chunk
+                    if len(body) >= settings.MAX_HTML_BYTES:
+                        break
+                html_content = _decode_html(body, response.encoding)
             
-            return self.extract_text_content(response.text, url)
+            result = self.extract_text_content(html_content, url)
+            self._remember_page(url, response.headers, result)
+            return result
             
-        except requests.exceptions.RequestException as e:
+        except httpx.HTTPError as e:
             logger.error(f"Error fetching {url}: {e}")
             return {
                 "title": "",
@@ -136,30 +415,48 @@ class WebScraper:
             Dictionary with content and metadata
         """
         try:
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=self.timeout)) as response:
-                    if response.status != 200:
-                        return {
-                            "title": "",
-                            "content": f"HTTP {response.status}: {response.reason}",
-                            "url": url,
-                            "word_count": 0,
-                            "extracted_at": time.time()
-                        }
-                    
-                    content_type = response.headers.get('content-type', '').lower()
-                    if 'text/html' not in content_type:
-                        return {
-                            "title": "",
-                            "content": f"Non-HTML content: {content_type}",
-                            "url": url,
-                            "word_count": 0,
-                            "extracted_at": time.time()
-                        }
-                    
-                    html_content = await response.text()
-                    return self.extract_text_content(html_content, url)
-                    
+            session = self._get_async_session()
+            async with session.get(url, headers=self._conditional_headers(url)) as response:
+                # The server confirmed the cached copy is still current
+                if response.status == 304:
+                    cached = self._cached_page(url)
+                    if cached is not None:
+                        return cached
+                
+                if response.status != 200:
+                    return {
+                        "title": "",
+                        "content": f"HTTP {response.status}: {response.reason}",
+                        "url": url,
+                        "word_count": 0,
+                        "extracted_at": time.time()
+                    }
+                
+                # Only the headers have been read; returning closes the connection
+                # without downloading a non-HTML body
+                content_type = response.headers.get('content-type', '').lower()
+                if 'text/html' not in content_type:
+                    return {
+                        "title": "",
+                        "content": f"Non-HTML content: {content_type}",
+                        "url": url,
+                        "word_count": 0,
+                        "extracted_at": time.time()
+                    }
+                
+                body = bytearray()
+                async for chunk in response.content.iter_chunked(DOWNLOAD_CHUNK_BYTES):
+                    body += chunk
+                    if len(body) >= settings.MAX_HTML_BYTES:
+                        break
+                html_content = _decode_html(body, response.charset)
+                
+                # Parsing is CPU-bound; lxml releases the GIL, so run it on a worker
+                # thread and keep the event loop free for other fetches
+                result = await asyncio.to_thread(self.extract_text_content, html_content, url)
+                self._remember_page(url, response.headers, result)
+                return result
+        
         except Exception as e:
             logger.error(f"Error fetching {url}: {e}")
             return {
@@ -169,23 +466,51 @@ class WebScraper:
                 "word_count": 0,
                 "extracted_at": time.time()
             }
+    
+    async def fetch_many(self, urls: List[str], concurrency: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Fetch several URLs concurrently over the shared session.
+        
+        Args:
+            urls: URLs to fetch
+            concurrency: Maximum fetches in flight; defaults to MAX_FETCH_CONCURRENCY
+        
+        Returns:
+            Content dictionaries in the same order as urls; failed fetches hold
+            an error message like fetch_url_content_async
+        """
+        semaphore = asyncio.Semaphore(concurrency or settings.MAX_FETCH_CONCURRENCY)
+        
+        async def _fetch_one(url: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.fetch_url_content_async(url)
+        
+        return await asyncio.gather(*[_fetch_one(url) for url in urls])
 
 
 class SearchTool:
-    """Search tool using Tavily for web search."""
+    """
+    Search tool using Tavily for web search.
+    
+    Results carry Tavily's extracted content, so the tool holds no scraper; pages
+    that need fetching go through the shared scraper from get_web_scraper.
+    """
     
     def __init__(self):
         self.search_tool = TavilySearch(
             api_key=settings.TAVILY_API_KEY,
             max_results=settings.MAX_SOURCES_PER_QUERY
         )
-        self.scraper = WebScraper()
         logger.info(f"SearchTool initialized with max_results={settings.MAX_SOURCES_PER_QUERY}")
     
     def search_and_fetch(self, queries: List[str]) -> List[Dict[str, Any]]:
         """
         Search for content using Tavily and return search results directly.
         
+        Queries are sent as one Runnable batch, so up to MAX_SEARCH_CONCURRENCY
+        searches overlap instead of paying each round-trip in turn. Every search
+        still takes a token from the shared rate limiter.
+        
         Args:
             queries: List of search queries
             
@@ -194,173 +519,233 @@ class SearchTool:
         """
         all_results = []
         
-        for query in queries:
+        search: RunnableLambda[str, Any] = RunnableLambda(self._search_query)
+        responses: List[Any] = search.batch(
+            list(queries),
+            config={"max_concurrency": max(1, settings.MAX_SEARCH_CONCURRENCY)},
+            return_exceptions=True
+        )
+        
+        for query, search_response in zip(queries, responses):
             try:
-                # Search for results
-                search_response = self.search_tool.invoke({"query": query})
-                
-                # Handle different response formats
-                search_results = []
-                if isinstance(search_response, dict):
-                    if 'results' in search_response:
-                        search_results = search_response['results']
-                    elif 'content' in search_response:
-                        # Single result format
-                        search_results = [search_response]
-                    else:
-                        logger.warning(f"Unexpected dict response format for query '{query}': {list(search_response.keys())}")
-                        continue
-                elif isinstance(search_response, list):
-                    search_results = search_response
-                elif isinstance(search_response, str):
-                    logger.warning(f"Tavily returned string response for query '{query}': {search_response[:100]}...")
-                    # Try to extract URLs from the string response
-                    import re
-                    urls = re.findall(r'https?://[^\s<>"]+', search_response)
-                    if urls:
-                        search_results = [{"url": url, "title": f"Result from {url}", "content": search_response[:500]} for url in urls[:5]]
-                    else:
-                        continue
-                else:
-                    logger.warning(f"Unexpected search response format for query '{query}': {type(search_response)}")
-                    continue
-                
-                # Convert search results to content format (no web scraping)
-                for result in search_results:
-                    if isinstance(result, dict):
-                        url = result.get('url', '')
-                        if url and self._is_valid_url(url):
-                            content = {
-                                "title": result.get('title', 'Unknown Title'),
-                                "content": result.get('content', 'Content not available'),
-                                "url": url,
-                                "word_count": len(result.get('content', '').split()),
-                                "extracted_at": time.time()
-                            }
-                            if content["word_count"] > 20:  # Lower threshold since we're not scraping
-                                all_results.append(content)
-                    elif isinstance(result, str):
-                        # Handle string results
-                        content = {
-                            "title": f"Search result for {query}",
-                            "content": result,
-                            "url": f"https://search-result-{len(all_results)}.example.com",
-                            "word_count": len(result.split()),
-                            "extracted_at": time.time()
-                        }
-                        if content["word_count"] > 20:
-                            all_results.append(content)
-                
-                # Add delay to be respectful
-                time.sleep(1)
+                if isinstance(search_response, Exception):
+                    raise search_response
+                all_results.extend(self._build_results(self._normalize_results(search_response, query), query))
                 
             except Exception as e:
                 logger.error(f"Error processing query '{query}': {e}")
                 continue
         
-        return all_results
+        return self._dedupe_results(all_results)
+    
+    def _search_query(self, query: str) -> Any:
+        """
+        Run a single rate-limited search query.
+        
+        Args:
+            query: Search query
+        
+        Returns:
+            Raw response from the search tool
+        """
+        search_rate_limiter.acquire()
+        return self.search_tool.invoke({"query": query})
     
     async def search_and_fetch_async(self, queries: List[str]) -> List[Dict[str, Any]]:
         """
         Async version of search_and_fetch.
         
+        Queries are fed through a queue to a fixed pool of MAX_SEARCH_CONCURRENCY
+        workers, which together with the shared search rate limit keeps large
+        plans from saturating the search API. Results keep the plan's query order,
+        so downstream deduplication always keeps the earlier query's copy of a
+        source.
+        
         Args:
             queries: List of search queries
             
         Returns:
             List of search result dictionaries
         """
-        all_results = []
+        query_queue: "asyncio.Queue[Tuple[int, str]]" = asyncio.Queue()
+        for position, query in enumerate(queries):
+            query_queue.put_nowait((position, query))
+        results_per_query: List[List[Dict[str, Any]]] = [[] for _ in queries]
         
-        for query in queries:
-            try:
-                # Search for results
-                search_response = self.search_tool.invoke({"query": query})
-                
-                # Handle different response formats
-                search_results = []
-                if isinstance(search_response, dict):
-                    if 'results' in search_response:
-                        search_results = search_response['results']
-                    elif 'content' in search_response:
-                        # Single result format
-                        search_results = [search_response]
-                    else:
-                        logger.warning(f"Unexpected dict response format for query '{query}': {list(search_response.keys())}")
-                        continue
-                elif isinstance(search_response, list):
-                    search_results = search_response
-                elif isinstance(search_response, str):
-                    logger.warning(f"Tavily returned string response for query '{query}': {search_response[:100]}...")
-                    # Try to extract URLs from the string response
-                    import re
-                    urls = re.findall(r'https?://[^\s<>"]+', search_response)
-                    if urls:
-                        search_results = [{"url": url, "title": f"Result from {url}", "content": search_response[:500]} for url in urls[:5]]
-                    else:
-                        continue
-                else:
-                    logger.warning(f"Unexpected search response format for query '{query}': {type(search_response)}")
-                    continue
-                
-                # Convert search results to content format (no web scraping)
-                for result in search_results:
-                    if isinstance(result, dict):
-                        url = result.get('url', '')
-                        if url and self._is_valid_url(url):
-                            content = {
-                                "title": result.get('title', 'Unknown Title'),
-                                "content": result.get('content', 'Content not available'),
-                                "url": url,
-                                "word_count": len(result.get('content', '').split()),
-                                "extracted_at": time.time()
-                            }
-                            if content["word_count"] > 20:  # Lower threshold since we're not scraping
-                                all_results.append(content)
-                    elif isinstance(result, str):
-                        # Handle string results
-                        content = {
-                            "title": f"Search result for {query}",
-                            "content": result,
-                            "url": f"https://search-result-{len(all_results)}.example.com",
-                            "word_count": len(result.split()),
-                            "extracted_at": time.time()
-                        }
-                        if content["word_count"] > 20:
-                            all_results.append(content)
-                
-                # Add delay to be respectful
-                await asyncio.sleep(1)
-                
-            except Exception as e:
-                logger.error(f"Error processing query '{query}': {e}")
-                continue
+        async def _search_worker() -> None:
+            while True:
+                try:
+                    position, query = query_queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                results_per_query[position] = await self._search_query_async(query)
         
-        return all_results
+        worker_count = min(max(1, settings.MAX_SEARCH_CONCURRENCY), len(queries))
+        await asyncio.gather(*[_search_worker() for _ in range(worker_count)])
+        return self._dedupe_results(
+            result for query_results in results_per_query for result in query_results
+        )
     
-    def _is_valid_url(self, url: str) -> bool:
+    @staticmethod
+    def _dedupe_results(results: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
-        Check if URL is valid and safe to fetch.
+        Drop results already returned for an earlier query.
+        
+        Text-only results carry placeholder URLs derived from their text, so
+        matching on URL catches those too.
         
         Args:
-            url: URL to validate
-            
+            results: Search result dictionaries in query order
+        
+        Returns:
+            First occurrence of each result, in order
+        """
+        seen_urls = set()
+        unique_results = []
+        for result in results:
+            if result["url"] in seen_urls:
+                continue
+            seen_urls.add(result["url"])
+            unique_results.append(result)
+        return unique_results
+    
+    async def _search_query_async(self, query: str) -> List[Dict[str, Any]]:
+        """
+        Run a single search query and convert its results to content format.
+        
+        Args:
+            query: Search query
+        
         Returns:
-            True if URL is valid and safe
+            List of search result dictionaries for this query
         """
         try:
-            parsed = urlparse(url)
-            return (
-                parsed.scheme in ['http', 'https'] and
-                parsed.netloc and
-                not any(blocked in url.lower() for blocked in [
-                    'javascript:', 'data:', 'file:', 'ftp:'
-                ])
-            )
-        except Exception:
-            return False
+            # Search for results
+            await search_rate_limiter.acquire_async()
+            search_response = await self.search_tool.ainvoke({"query": query})
+            return self._build_results(self._normalize_results(search_response, query), query)
+        
+        except Exception as e:
+            logger.error(f"Error processing query '{query}': {e}")
+            return []
+    
+    def _normalize_results(self, search_response: Any, query: str) -> List[Any]:
+        """
+        Flatten the response shapes Tavily can return into a list of results.
+        
+        Args:
+            search_response: Raw response from the search tool
+            query: Query the response belongs to, for logging
+        
+        Returns:
+            Result dicts and bare result strings; empty if the shape is unknown
+        """
+        # Handle different response formats
+        if isinstance(search_response, dict):
+            if 'results' in search_response:
+                return search_response['results']
+            if 'content' in search_response:
+                # Single result format
+                return [search_response]
+            logger.warning(f"Unexpected dict response format for query '{query}': {list(search_response.keys())}")
+            return []
+        
+        if isinstance(search_response, list):
+            return search_response
+        
+        if isinstance(search_response, str):
+            logger.warning(f"Tavily returned string response for query '{query}': {search_response[:100]}...")
+            # Try to extract URLs from the string response
+            urls = URL_PATTERN.findall(search_response)
+            return [{"url": url, "title": f"Result from {url}", "content": search_response[:500]} for url in urls[:5]]
+        
+        logger.warning(f"Unexpected search response format for query '{query}': {type(search_response)}")
+        return []
+    
+    def _build_results(self, search_results: List[Any], query: str) -> List[Dict[str, Any]]:
+        """
+        Convert normalized search results to content format (no web scraping).
+        
+        Args:
+            search_results: Output of _normalize_results
+            query: Query the results belong to
+        
+        Returns:
+            Search result dictionaries with enough text to summarize
+        """
+        now = time.time()
+        split = str.split
+        query_results = []
+        
+        for result in search_results:
+            if isinstance(result, dict):
+                url = result.get('url', '')
+                if not url or not _is_valid_url(url):
+                    continue
+                content_str = result.get('content') or ''
+                title = result.get('title', 'Unknown Title')
+            elif isinstance(result, str):
+                # Handle string results
+                content_str = result
+                url = _placeholder_url(result)
+                title = f"Search result for {query}"
+            else:
+                continue
+            
+            word_count = len(split(content_str))
+            # Lower threshold since we're not scraping
+            if word_count > MIN_RESULT_WORDS:
+                query_results.append({
+                    "title": title,
+                    "content": content_str,
+                    "url": url,
+                    "word_count": word_count,
+                    "extracted_at": now
+                })
+        
+        return query_results
+
+
+# Global instances. The rate limiter is shared because the limit applies to the
+# API key, not to one SearchTool. The tools themselves are built on first use so
+# importing this module does not construct the Tavily client or HTTP sessions
+search_rate_limiter = TokenBucket(settings.TAVILY_REQUESTS_PER_SECOND)
+_search_tool: Optional[SearchTool] = None
+_web_scraper: Optional[WebScraper] = None
+_tools_lock = threading.Lock()
+
+
+def get_search_tool() -> SearchTool:
+    """
+    Return the shared search tool, creating it on first use.
+    
+    Returns:
+        Global SearchTool instance
+    """
+    global _search_tool
+    if _search_tool is None:
+        with _tools_lock:
+            if _search_tool is None:
+                _search_tool = SearchTool()
+    return _search_tool
+
+
+def get_web_scraper() -> WebScraper:
+    """
+    Return the shared web scraper, creating it on first use.
+    
+    Returns:
+        Global WebScraper instance
+    """
+    global _web_scraper
+    if _web_scraper is None:
+        with _tools_lock:
+            if _web_scraper is None:
+                _web_scraper = WebScraper()
+    return _web_scraper
 
 
-# Global instances
-search_tool = SearchTool()
-web_scraper = WebScraper() 
\ No newline at end of file
+async def close_tools() -> None:
+    """Release network resources held by the global web scraper, if it was created."""
+    if _web_scraper is not None:
+        await _web_scraper.aclose()
@@ -0,0 +1,79 @@
+"""
+Shared test fixtures.
+"""
+
+from types import MappingProxyType
+
+import pytest
+import pytest_asyncio
+
+from app.cache import llm_cache
+from app.schemas import FinalBrief, ResearchPlan, SourceSummary
+
+
+@pytest.fixture(scope="session")
+def client():
+    """
+    Create one test client shared by every API test.
+    
+    Entering the client runs the app's startup handlers once for the session,
+    and its shutdown handlers once at the end.
+    """
+    from fastapi.testclient import TestClient
+    from app.main import app
+    
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest_asyncio.fixture
+async def async_client():
+    """Create an async client that calls the app in-process, for concurrent requests."""
+    import httpx
+    from app.main import app
+    
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.fixture(scope="session")
+def sample_source_kwargs():
+    """Field values for a valid SourceSummary, read-only so tests can't alter them."""
+    return MappingProxyType({
+        "url": "https://example.com",
+        "title": "Test Source",
+        "summary": "Test summary",
+        "relevance_score": 0.8,
+        "key_points": ("point 1",),
+        "source_type": "article",
+        "publication_date": "2024-01-15",
+        "author": "Test Author"
+    })
+
+
+@pytest.fixture(scope="session")
+def sample_source(sample_source_kwargs):
+    """One validated SourceSummary shared by tests that only read it."""
+    return SourceSummary(**sample_source_kwargs)
+
+
+@pytest.fixture(scope="session", autouse=True)
+def warm_schemas(sample_source_kwargs):
+    """Run each core model's first validation and JSON round-trip before any test is timed."""
+    brief = FinalBrief(
+        topic="Schema warm-up topic",
+        executive_summary="Executive summary long enough to satisfy the minimum length validation",
+        synthesis="Synthesis for the schema warm-up",
+        key_insights=["insight"],
+        references=[SourceSummary(**sample_source_kwargs)]
+    )
+    FinalBrief.model_validate_json(brief.model_dump_json())
+    ResearchPlan(queries=["query"], rationale="rationale", expected_sources=1, focus_areas=["area"])
+
+
+@pytest.fixture(autouse=True)
+def clear_llm_cache():
+    """Keep cached LLM responses from leaking between tests."""
+    llm_cache.clear()
+    yield
+    llm_cache.clear()
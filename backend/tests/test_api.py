@@ -2,148 +2,205 @@
 API endpoint tests for the research brief generator.
 """
 
+import asyncio
 import pytest
-from fastapi.testclient import TestClient
-from unittest.mock import patch, Mock
+from unittest.mock import Mock
 import json
+from datetime import datetime
+from functools import partial
+from types import SimpleNamespace
 
-from app.main import app
+import orjson
+
+from app.monitoring import TokenUsage
 from app.schemas import FinalBrief, SourceSummary, ResearchDepth
 
 
+# Request body shared by the tests that post a valid brief request, serialized once
+VALID_BRIEF_BODY = orjson.dumps({
+    "topic": "test topic with sufficient length",
+    "depth": "moderate",
+    "follow_up": False,
+    "user_id": "test-user"
+})
+JSON_HEADERS = {"content-type": "application/json"}
+
+
+async def _replay_events(events, state, stream_mode):
+    """Stand in for research_graph.astream by yielding prebuilt (mode, event) pairs."""
+    for event in events:
+        yield event
+
+
+@pytest.fixture(scope="session")
+def brief_events(sample_source):
+    """Graph events for a successful run, built once and replayed by the mocked graph."""
+    test_brief = FinalBrief(
+        topic="test topic",
+        executive_summary="Test executive summary with sufficient length to meet the minimum requirement of 50 characters for validation",
+        synthesis="Test synthesis with sufficient length to meet the minimum requirement",
+        key_insights=["insight 1", "insight 2"],
+        references=[sample_source],
+        generated_at=datetime(2024, 1, 1)
+    )
+    return (
+        ("updates", {
+            "planner": {"plan": {"queries": ["test query"]}},
+            "search_and_fetch": {"fetched_content": [{"url": "test.com"}]},
+            "per_source_summarizer": {"summaries": [{"title": "Test"}]}
+        }),
+        ("custom", {"node": "synthesizer", "partial_brief": {"executive_summary": "Test executive"}}),
+        ("updates", {
+            "synthesizer": {
+                "final_brief": test_brief
+            }
+        })
+    )
+
+
+@pytest.fixture(scope="class")
+def mock_metrics():
+    """Metrics collector mock reporting one completion, built once per test class."""
+    # Metrics collector context manager
+    metrics_context = Mock()
+    metrics_context.__enter__ = Mock(return_value=metrics_context)
+    metrics_context.__exit__ = Mock(return_value=None)
+    metrics_context.token_usage = [
+        TokenUsage(
+            operation="completion",
+            model="gpt-4",
+            prompt_tokens=500,
+            completion_tokens=500,
+            total_tokens=1000
+        )
+    ]
+    metrics_context.get_total_tokens = Mock(return_value=1000)
+    metrics_context.get_cost_estimate = Mock(return_value=0.05)
+    
+    metrics = Mock()
+    metrics.track_execution.return_value = metrics_context
+    metrics.get_trace_url.return_value = "https://smith.langchain.com/test"
+    metrics.langsmith_manager.is_enabled = True
+    return metrics
+
+
+@pytest.fixture(scope="session")
+def history_payload():
+    """Stored history for one user, as an immutable tuple shared by every test class."""
+    return (
+        {
+            "id": 1,
+            "topic": "test topic",
+            "executive_summary": "Test summary with sufficient length",
+            "generated_at": "2024-01-01T00:00:00",
+            "key_insights": ["insight 1"],
+            "references": []
+        },
+    )
+
+
+@pytest.fixture(scope="class")
+def mock_storage(history_payload):
+    """Storage mock with one user's briefs, history and stats, built once per test class."""
+    storage = Mock()
+    storage.get_user_briefs.return_value = []
+    storage.save_brief.return_value = True
+    storage.get_user_stats.return_value = {
+        "total_briefs": 5,
+        "recent_briefs": 2,
+        "user_created": "2024-01-01"
+    }
+    storage.get_user_history.return_value = history_payload
+    return storage
+
+
 @pytest.fixture
-def client():
-    """Create a test client."""
-    return TestClient(app)
+def mocked_app(monkeypatch, mock_metrics, mock_storage):
+    """Replace the graph, metrics collector and storage used by the API with configured mocks."""
+    graph = Mock()
+    
+    monkeypatch.setattr('app.main.research_graph', graph)
+    monkeypatch.setattr('app.main.metrics_collector', mock_metrics)
+    monkeypatch.setattr('app.main.storage', mock_storage)
+    monkeypatch.setattr('app.main.log_execution_metrics', Mock())
+    return SimpleNamespace(graph=graph, metrics=mock_metrics, storage=mock_storage)
 
 
-class TestHealthEndpoint:
-    """Test the health check endpoint."""
+class TestReadOnlyEndpoints:
+    """Test the read-only information endpoints."""
     
-    def test_health_endpoint(self, client):
-        """Test that the health endpoint returns 200."""
-        response = client.get("/health")
-        assert response.status_code == 200
-        data = response.json()
+    async def test_read_only_endpoints(self, async_client):
+        """Test that the health, config, models and root endpoints all respond, requested concurrently."""
+        health, config, models, root = await asyncio.gather(
+            async_client.get("/health"),
+            async_client.get("/config"),
+            async_client.get("/models"),
+            async_client.get("/")
+        )
+        
+        assert health.status_code == 200
+        data = health.json()
         assert data["status"] == "healthy"
-        assert "timestamp" in data
-        assert "environment" in data
-        assert "llm_provider" in data
-        assert "langsmith" in data
+        assert data.keys() >= {"timestamp", "environment", "llm_provider", "langsmith"}
+        
+        assert config.status_code == 200
+        data = config.json()
+        assert data.keys() >= {"environment", "llm_provider", "storage"}
+        
+        assert models.status_code == 200
+        assert "primary_model" in models.json()
+        
+        assert root.status_code == 200
+        assert root.json()["status"] == "running"
 
 
 class TestBriefEndpoint:
     """Test the brief generation endpoint."""
     
-    @patch('app.main.research_graph')
-    @patch('app.main.metrics_collector')
-    @patch('app.main.storage')
-    def test_generate_brief_success(self, mock_storage, mock_metrics, mock_graph, client):
+    def test_generate_brief_success(self, client, mocked_app, brief_events):
         """Test successful brief generation."""
-        # Mock the graph execution as an async generator
-        async def mock_astream(state):
-            # Create a proper FinalBrief object
-            from app.schemas import FinalBrief, SourceSummary
-            from datetime import datetime
-            
-            test_brief = FinalBrief(
-                topic="test topic",
-                executive_summary="Test executive summary with sufficient length to meet the minimum requirement of 50 characters for validation",
-                synthesis="Test synthesis with sufficient length to meet the minimum requirement",
-                key_insights=["insight 1", "insight 2"],
-                references=[
-                    SourceSummary(
-                        url="https://example.com",
-                        title="Test Source",
-                        summary="Test summary",
-                        relevance_score=0.8,
-                        key_points=["point 1"],
-                        source_type="article",
-                        publication_date="2024-01-15",
-                        author="Test Author"
-                    )
-                ],
-                generated_at=datetime(2024, 1, 1)
-            )
-            
-            yield {
-                "planner": {"plan": {"queries": ["test query"]}},
-                "search_and_fetch": {"fetched_content": [{"url": "test.com"}]},
-                "per_source_summarizer": {"summaries": [{"title": "Test"}]},
-                "synthesizer": {
-                    "final_brief": test_brief
-                }
-            }
-        
-        mock_graph.astream = mock_astream
-        
-        # Mock metrics collector context manager
-        mock_metrics_context = Mock()
-        mock_metrics_context.__enter__ = Mock(return_value=mock_metrics_context)
-        mock_metrics_context.__exit__ = Mock(return_value=None)
-        mock_metrics_context.token_usage = [
-            Mock(
-                operation="completion",
-                model="gpt-4",
-                prompt_tokens=500,
-                completion_tokens=500,
-                total_tokens=1000
-            )
-        ]
-        mock_metrics_context.get_total_tokens = Mock(return_value=1000)
-        mock_metrics_context.get_cost_estimate = Mock(return_value=0.05)
+        mocked_app.graph.astream = partial(_replay_events, brief_events)
         
-        mock_metrics.track_execution.return_value = mock_metrics_context
-        mock_metrics.get_trace_url.return_value = "https://smith.langchain.com/test"
-        mock_metrics.langsmith_manager.is_enabled = True
+        # Make request
+        response = client.post("/brief", content=VALID_BRIEF_BODY, headers=JSON_HEADERS)
         
-        # Mock storage
-        mock_storage.get_user_history.return_value = []
-        mock_storage.save_brief.return_value = True
-        
-        # Mock the log_execution_metrics function to avoid any issues
-        with patch('app.main.log_execution_metrics'):
-            # Make request
-            response = client.post(
-                "/brief",
-                json={
-                    "topic": "test topic with sufficient length",
-                    "depth": "moderate",
-                    "follow_up": False,
-                    "user_id": "test-user"
-                }
-            )
-            
-            assert response.status_code == 200
-            data = response.json()
-            assert "brief" in data
-            assert "execution_time" in data
-            assert "trace_url" in data
-            assert data["brief"]["topic"] == "test topic"
+        assert response.status_code == 200
+        data = response.json()
+        assert data.keys() >= {"brief", "execution_time", "trace_url"}
+        assert data["brief"]["topic"] == "test topic"
     
-    def test_generate_brief_invalid_request(self, client):
-        """Test brief generation with invalid request."""
-        response = client.post(
-            "/brief",
-            json={
-                "topic": "short",  # Too short
-                "depth": "moderate",
-                "follow_up": False,
-                "user_id": "test-user"
-            }
-        )
+    def test_stream_brief_sends_partial_sections(self, client, mocked_app, brief_events):
+        """Test that the streaming endpoint forwards partial sections before the final brief."""
+        mocked_app.graph.astream = partial(_replay_events, brief_events)
         
-        assert response.status_code == 422  # Validation error
+        response = client.post("/brief/stream", content=VALID_BRIEF_BODY, headers=JSON_HEADERS)
+        
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [
+            (block.split("\n")[0].removeprefix("event: "), orjson.loads(block.split("\n")[1].removeprefix("data: ")))
+            for block in response.text.strip().split("\n\n")
+        ]
+        event_names = [name for name, _ in events]
+        assert event_names.index("partial_brief") < event_names.index("brief") == len(events) - 1
+        assert events[event_names.index("partial_brief")][1] == {"executive_summary": "Test executive"}
+        assert events[-1][1]["topic"] == "test topic"
     
-    def test_generate_brief_missing_fields(self, client):
-        """Test brief generation with missing required fields."""
-        response = client.post(
-            "/brief",
-            json={
-                "topic": "test topic with sufficient length"
-                # Missing required fields
-            }
-        )
+    @pytest.mark.parametrize("payload", [
+        {
+            "topic": "tiny",  # Too short
+            "depth": "moderate",
+            "follow_up": False,
+            "user_id": "test-user"
+        },
+        {
+            "topic": "test topic with sufficient length"
+            # Missing required fields
+        }
+    ], ids=["invalid_request", "missing_fields"])
+    def test_generate_brief_rejects_bad_request(self, client, payload):
+        """Test brief generation with an invalid or incomplete request."""
+        response = client.post("/brief", json=payload)
         
         assert response.status_code == 422  # Validation error
 
@@ -152,98 +209,58 @@ class TestMonitoringEndpoint:
     """Test the monitoring endpoint."""
     
     def test_monitoring_endpoint(self, client):
-        """Test that the monitoring endpoint returns status."""
-        response = client.get("/monitoring")
+        """Test that the monitoring status endpoint reports tracing and capabilities."""
+        response = client.get("/monitoring/status")
         assert response.status_code == 200
         data = response.json()
-        assert "langsmith_enabled" in data
-        assert "tracing_enabled" in data
-        assert "trace_urls" in data
+        assert data.keys() >= {"langsmith_enabled", "tracing_configured", "capabilities"}
+        assert "trace_urls" in data["capabilities"]
 
 
 class TestStatsEndpoint:
     """Test the stats endpoint."""
     
-    @patch('app.main.storage')
-    def test_stats_endpoint(self, mock_storage, client):
+    def test_stats_endpoint(self, client, monkeypatch, mock_storage):
         """Test that the stats endpoint returns user statistics."""
-        # Mock storage response
-        mock_storage.get_user_stats.return_value = {
-            "total_briefs": 5,
-            "recent_briefs": 2,
-            "user_created": "2024-01-01"
-        }
+        monkeypatch.setattr('app.main.storage', mock_storage)
         
-        response = client.get("/stats/test-user")
+        response = client.get("/user/test-user/stats")
         assert response.status_code == 200
         data = response.json()
-        assert "total_briefs" in data
-        assert "recent_briefs" in data
-        assert data["total_briefs"] == 5
+        assert data["user_id"] == "test-user"
+        assert data["stats"].keys() >= {"total_briefs", "recent_briefs"}
+        assert data["stats"]["total_briefs"] == 5
 
 
 class TestHistoryEndpoint:
     """Test the history endpoint."""
     
-    @patch('app.main.storage')
-    def test_history_endpoint(self, mock_storage, client):
+    def test_history_endpoint(self, client, monkeypatch, mock_storage):
         """Test that the history endpoint returns user history."""
-        # Mock storage response
-        mock_storage.get_user_history.return_value = [
-            {
-                "id": 1,
-                "topic": "test topic",
-                "executive_summary": "Test summary with sufficient length",
-                "generated_at": "2024-01-01T00:00:00",
-                "key_insights": ["insight 1"],
-                "references": []
-            }
-        ]
+        monkeypatch.setattr('app.main.storage', mock_storage)
         
-        response = client.get("/history/test-user")
-        assert response.status_code == 200
-        data = response.json()
-        assert "history" in data
-        assert len(data["history"]) == 1
-        assert data["history"][0]["topic"] == "test topic"
-
-
-class TestConfigEndpoint:
-    """Test the configuration endpoint."""
-    
-    def test_config_endpoint(self, client):
-        """Test that the config endpoint returns configuration."""
-        response = client.get("/config")
+        response = client.get("/user/test-user/history")
         assert response.status_code == 200
         data = response.json()
-        assert "environment" in data
-        assert "llm_provider" in data
-        assert "storage" in data
+        assert data["total_count"] == 1
+        assert len(data["briefs"]) == 1
+        assert data["briefs"][0]["topic"] == "test topic"
 
 
 class TestErrorHandling:
     """Test error handling in the API."""
     
-    @patch('app.main.research_graph')
-    def test_graph_execution_error(self, mock_graph, client):
+    def test_graph_execution_error(self, client, mocked_app):
         """Test handling of graph execution errors."""
         # Mock graph to raise exception
-        mock_graph.astream.side_effect = Exception("Graph execution failed")
+        mocked_app.graph.astream.side_effect = Exception("Graph execution failed")
         
-        response = client.post(
-            "/brief",
-            json={
-                "topic": "test topic with sufficient length",
-                "depth": "moderate",
-                "follow_up": False,
-                "user_id": "test-user"
-            }
-        )
+        response = client.post("/brief", content=VALID_BRIEF_BODY, headers=JSON_HEADERS)
         
         assert response.status_code == 500
         data = response.json()
-        assert "error" in data
-        assert "Graph execution failed" in data["error"]
+        assert data["error"] == "Failed to generate research brief"
+        assert "Graph execution failed" in data["details"]["original_error"]
     
     def test_invalid_json(self, client):
         """Test handling of invalid JSON."""
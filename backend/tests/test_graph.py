@@ -2,16 +2,177 @@
 End-to-end tests for the research brief generation graph.
 """
 
+import orjson
 import pytest
-import asyncio
-from unittest.mock import Mock, patch, AsyncMock
-from typing import Dict, Any
+from unittest.mock import DEFAULT, Mock, patch, AsyncMock
+from typing import Any, Dict, List, Optional, Set
 
-from app.graph import research_graph
-from app.schemas import FinalBrief, SourceSummary, ResearchPlan
+from langchain_core.messages import AIMessageChunk
+from langchain_core.runnables import Runnable
+from langgraph.errors import GraphRecursionError
+
+from app.graph import research_graph, should_summarize_context
+from app.nodes import format_history_context
+from app.schemas import ContextSummary, FinalBrief, SourceSummary, SourceSummaryBatch, ResearchPlan
 from app.state import GraphState
 
 
+# Prior brief a follow-up run carries in its history. Validation is tested in
+# test_schemas.py, so it is built with model_construct; FinalBrief is frozen, so
+# one instance is safely shared by every run
+_PREVIOUS_HISTORY_BRIEF = FinalBrief.model_construct(
+    topic="previous topic",
+    executive_summary="Previous research summary with sufficient length to meet the minimum requirement of 50 characters for validation",
+    synthesis="Previous synthesis with sufficient length to meet the minimum requirement",
+    key_insights=["Previous insight"],
+    references=[],
+    metadata={}
+)
+
+
+# Content the mocked search tool fetches for every graph run
+_FETCHED_CONTENT = (
+    {
+        "url": "https://example.com/ai-trends",
+        "title": "AI Trends 2024",
+        "content": "Comprehensive analysis of artificial intelligence trends...",
+        "word_count": 500,
+        "extracted_at": 1234567890
+    },
+)
+
+
+# The cached responses skip validation with model_construct: they only feed mocks,
+# and the nodes validate the dumped fields when they parse the LLM output
+
+@pytest.fixture(scope="session")
+def cached_plan() -> ResearchPlan:
+    """Research plan the mocked planner returns, built once per session."""
+    return ResearchPlan.model_construct(
+        queries=["AI trends 2024", "artificial intelligence developments"],
+        rationale="Comprehensive search strategy",
+        expected_sources=5,
+        focus_areas=["machine learning", "AI ethics", "industry adoption"]
+    )
+
+
+@pytest.fixture(scope="session")
+def cached_summary() -> SourceSummary:
+    """Source summary the mocked summarizer returns, built once per session."""
+    return SourceSummary.model_construct(
+        url="https://example.com/ai-trends",
+        title="AI Trends 2024",
+        summary="Comprehensive analysis of artificial intelligence trends in 2024",
+        relevance_score=0.9,
+        key_points=["Machine learning advances", "AI ethics", "Industry adoption"],
+        source_type="article",
+        publication_date="2024-01-15",
+        author="AI Research Team"
+    )
+
+
+@pytest.fixture(scope="session")
+def cached_brief(cached_summary: SourceSummary) -> FinalBrief:
+    """Final brief the mocked synthesizer returns, built once per session."""
+    return FinalBrief.model_construct(
+        topic="artificial intelligence trends 2024",
+        executive_summary="AI trends in 2024 show significant advances in machine learning and increased focus on ethical AI development with comprehensive analysis of emerging technologies.",
+        synthesis="The research reveals three main trends: 1) Advanced machine learning models, 2) Growing emphasis on AI ethics and responsible development, 3) Increased industry adoption across sectors with detailed analysis.",
+        key_insights=[
+            "Machine learning models are becoming more sophisticated",
+            "Ethical AI is gaining prominence",
+            "Industry adoption is accelerating"
+        ],
+        references=[cached_summary],
+        context_used=None,
+        metadata={"test": True}
+    )
+
+
+def _structured_llm_returning(fields: Dict[str, Any]) -> Mock:
+    """
+    Create a mock structured LLM returning already-dumped response fields.
+    
+    Structured runnables return the parsed object rather than a message, and the
+    nodes run model_validate on it, so the dumped fields are returned as-is. The
+    mock is specced on Runnable, so ainvoke is an AsyncMock that nodes can await
+    directly, while invoke serves the nodes that call it synchronously.
+    """
+    llm = Mock(spec=Runnable)
+    llm.invoke.return_value = fields
+    llm.ainvoke.return_value = fields
+    return llm
+
+
+def _streaming_llm_returning(fields: Dict[str, Any], chunk_chars: int = 40) -> Mock:
+    """
+    Create a mock streaming structured LLM that streams the fields as JSON text.
+    
+    The synthesizer reads each chunk's text content and validates the assembled
+    JSON once the stream ends, so the payload is split across several chunks.
+    """
+    payload = orjson.dumps(fields).decode()
+    
+    async def astream(model_input, config=None):
+        for start in range(0, len(payload), chunk_chars):
+            yield AIMessageChunk(content=payload[start:start + chunk_chars])
+    
+    llm = Mock(spec=Runnable)
+    llm.astream = astream
+    return llm
+
+
+@pytest.fixture(scope="session")
+def cached_dumps(cached_plan, cached_summary, cached_brief) -> tuple:
+    """
+    Dumped planner, summarizer and synthesizer responses, computed once per session
+    and never mutated; the summarizer answers with a batch of summaries, and the
+    brief is dumped JSON-safe since the synthesizer streams it as JSON text.
+    """
+    return (
+        cached_plan.model_dump(),
+        {"summaries": [cached_summary.model_dump()]},
+        cached_brief.model_dump(mode="json")
+    )
+
+
+@pytest.fixture(scope="session")
+def cached_structured_llms(cached_dumps) -> tuple:
+    """Mock planner, summarizer and streaming synthesizer LLMs, wired once per session."""
+    plan_fields, summary_fields, brief_fields = cached_dumps
+    return (
+        _structured_llm_returning(plan_fields),
+        _structured_llm_returning(summary_fields),
+        _streaming_llm_returning(brief_fields)
+    )
+
+
+@pytest.fixture(scope="session", autouse=True)
+def warm_graph():
+    """
+    Run the compiled graph's first step once so LangGraph's one-time invocation
+    setup is paid before any test is timed; every test reuses this compiled graph.
+    
+    The LLM factories and search getter raise, so the planner takes its fallback
+    path without touching the network, and the recursion limit stops after that step.
+    """
+    warm_up_error = RuntimeError("graph warm-up")
+    with patch.multiple(
+        'app.nodes',
+        create_structured_llm=Mock(side_effect=warm_up_error),
+        create_streaming_structured_llm=Mock(side_effect=warm_up_error),
+        get_search_tool=Mock(side_effect=warm_up_error)
+    ):
+        try:
+            research_graph.invoke(
+                {"topic": "graph warm-up", "user_id": "warm-up", "depth": "shallow", "is_follow_up": False},
+                config={"recursion_limit": 1}
+            )
+        except GraphRecursionError:
+            pass
+    return research_graph
+
+
 class TestGraphExecution:
     """Test the research brief generation graph."""
     
@@ -36,311 +197,200 @@ class TestGraphExecution:
         }
     
     @pytest.fixture
-    def mock_source_summary(self) -> SourceSummary:
-        """Create a mock source summary."""
-        return SourceSummary(
-            url="https://example.com/ai-trends",
-            title="AI Trends 2024",
-            summary="Comprehensive analysis of artificial intelligence trends in 2024",
-            relevance_score=0.9,
-            key_points=["Machine learning advances", "AI ethics", "Industry adoption"],
-            source_type="article",
-            publication_date="2024-01-15",
-            author="AI Research Team"
-        )
+    def node_mocks(self):
+        """Patch the LLM factories and search tool used by the nodes with one patcher."""
+        with patch.multiple(
+            'app.nodes',
+            create_structured_llm=DEFAULT,
+            create_streaming_structured_llm=DEFAULT,
+            get_search_tool=DEFAULT
+        ) as mocks:
+            yield mocks
     
-    @pytest.fixture
-    def mock_final_brief(self, mock_source_summary: SourceSummary) -> FinalBrief:
-        """Create a mock final brief."""
-        return FinalBrief(
-            topic="artificial intelligence trends 2024",
-            executive_summary="AI trends in 2024 show significant advances in machine learning and increased focus on ethical AI development with comprehensive analysis of emerging technologies.",
-            synthesis="The research reveals three main trends: 1) Advanced machine learning models, 2) Growing emphasis on AI ethics and responsible development, 3) Increased industry adoption across sectors with detailed analysis.",
-            key_insights=[
-                "Machine learning models are becoming more sophisticated",
-                "Ethical AI is gaining prominence",
-                "Industry adoption is accelerating"
+    @pytest.mark.parametrize("is_follow_up, expected_topic, expected_nodes", [
+        pytest.param(False, "artificial intelligence trends 2024", None, id="success"),
+        pytest.param(True, "follow-up topic", None, id="follow_up"),
+        pytest.param(
+            False,
+            None,
+            [
+                {"planner"},
+                {"context_summarizer", "search_and_fetch"},
+                {"per_source_summarizer"},
+                {"synthesizer"}
             ],
-            references=[mock_source_summary],
-            context_used=None,
-            metadata={"test": True}
+            id="state_progression"
         )
-    
-    @patch('app.nodes.get_primary_llm')
-    @patch('app.nodes.get_secondary_llm')
-    @patch('app.nodes.search_tool')
-    @pytest.mark.asyncio
-    async def test_graph_execution_success(
+    ])
+    async def test_graph_execution(
         self,
-        mock_search_tool,
-        mock_secondary_llm,
-        mock_primary_llm,
+        node_mocks: Dict[str, Mock],
+        is_follow_up: bool,
+        expected_topic: Optional[str],
+        expected_nodes: Optional[List[Set[str]]],
         mock_initial_state: GraphState,
-        mock_final_brief: FinalBrief
+        cached_plan: ResearchPlan,
+        cached_dumps: tuple,
+        cached_structured_llms: tuple
     ):
-        """Test successful graph execution."""
-        # Mock LLM responses
-        mock_primary_llm.return_value = Mock()
-        mock_secondary_llm.return_value = Mock()
-        
+        """Test new and follow-up runs produce a brief, and that nodes run in order."""
         # Mock search tool
-        mock_search_tool.search_and_fetch.return_value = [
-            {
-                "url": "https://example.com/ai-trends",
-                "title": "AI Trends 2024",
-                "content": "Comprehensive analysis of artificial intelligence trends...",
-                "word_count": 500,
-                "extracted_at": 1234567890
-            }
-        ]
+        node_mocks["get_search_tool"].return_value.search_and_fetch_async = AsyncMock(
+            return_value=list(_FETCHED_CONTENT)
+        )
         
-        # Mock structured LLM responses
-        with patch('app.nodes.create_structured_llm') as mock_structured_llm:
-            # Mock planning response
-            mock_plan = ResearchPlan(
-                queries=["AI trends 2024", "artificial intelligence developments"],
-                rationale="Comprehensive search strategy",
-                expected_sources=5,
-                focus_areas=["machine learning", "AI ethics", "industry adoption"]
-            )
-            
-            # Mock summarization response
-            mock_summary = SourceSummary(
-                url="https://example.com/ai-trends",
-                title="AI Trends 2024",
-                summary="Comprehensive analysis of artificial intelligence trends in 2024",
-                relevance_score=0.9,
-                key_points=["Machine learning advances", "AI ethics"],
-                source_type="article",
-                publication_date="2024-01-15",
-                author="AI Research Team"
-            )
-            
-            # Create mock LLM instances that return proper responses
-            mock_plan_llm = Mock()
-            mock_plan_llm.invoke.return_value = Mock(content=mock_plan.model_dump())
-            
-            mock_summary_llm = Mock()
-            mock_summary_llm.invoke.return_value = Mock(content=mock_summary.model_dump())
-            
-            mock_synthesis_llm = Mock()
-            mock_synthesis_llm.invoke.return_value = Mock(content=mock_final_brief.model_dump())
-            
-            # Configure mock responses
-            mock_structured_llm.side_effect = [mock_plan_llm, mock_summary_llm, mock_synthesis_llm]
-            
-            # Execute graph
-            final_brief = None
-            async for event in research_graph.astream(mock_initial_state):
-                for node_name, node_output in event.items():
-                    if node_name != "__end__":
-                        if "final_brief" in node_output:
-                            final_brief = node_output["final_brief"]
+        plan_llm, summary_llm, synthesis_llm = cached_structured_llms
+        if is_follow_up:
+            # Modify state for follow-up
+            mock_initial_state["is_follow_up"] = True
+            mock_initial_state["history"] = [_PREVIOUS_HISTORY_BRIEF]
+            # Follow-ups plan through plan_with_context, which also returns the context
+            plan_llm = _structured_llm_returning({
+                "context": {
+                    "previous_topics": ["previous topic"],
+                    "key_findings": ["Previous insight"],
+                    "continuity_notes": "Builds on the previous topic"
+                },
+                "plan": cached_dumps[0]
+            })
+            synthesis_llm = _streaming_llm_returning({**cached_dumps[2], "topic": expected_topic})
+        
+        # Planning and summarization use structured LLMs; synthesis streams its JSON
+        node_mocks["create_structured_llm"].side_effect = [plan_llm, summary_llm]
+        node_mocks["create_streaming_structured_llm"].return_value = synthesis_llm
+        
+        if expected_nodes is not None:
+            # Node order is what's checked, so group the started tasks by superstep
+            state_progression: Dict[int, Set[str]] = {}
+            async for event in research_graph.astream(mock_initial_state, stream_mode="debug"):
+                if event["type"] == "task":
+                    state_progression.setdefault(event["step"], set()).add(event["payload"]["name"])
             
-            # Assertions
-            assert final_brief is not None
-            assert final_brief.topic == "artificial intelligence trends 2024"
-            assert len(final_brief.key_insights) > 0
-            assert len(final_brief.references) > 0
-    
-    @patch('app.nodes.get_primary_llm')
-    @patch('app.nodes.get_secondary_llm')
-    @patch('app.nodes.search_tool')
-    @pytest.mark.asyncio
-    async def test_graph_execution_with_error(
-        self,
-        mock_search_tool,
-        mock_secondary_llm,
-        mock_primary_llm,
-        mock_initial_state: GraphState
-    ):
-        """Test graph execution with error handling."""
-        # Mock LLM to raise exception
-        mock_primary_llm.side_effect = Exception("LLM API error")
+            assert list(state_progression.values()) == expected_nodes
+            return
         
-        # Execute graph
-        final_brief = None
-        async for event in research_graph.astream(mock_initial_state):
-            for node_name, node_output in event.items():
-                if node_name != "__end__":
-                    if "final_brief" in node_output:
-                        final_brief = node_output["final_brief"]
+        # Execute graph; only the terminal state matters
+        final_state = await research_graph.ainvoke(mock_initial_state)
+        final_brief = final_state["final_brief"]
         
-        # Should still get a final brief (error handler)
+        # The mocked plan, summaries and brief were used rather than the nodes' fallbacks
+        assert final_state["plan"].queries == cached_plan.queries
+        assert [summary.model_dump() for summary in final_state["summaries"]] == cached_dumps[1]["summaries"]
+        if is_follow_up:
+            assert final_state["context_summary"].previous_topics == ["previous topic"]
+        
+        # Assertions
         assert final_brief is not None
-        assert "error" in final_brief.metadata or "Error" in final_brief.executive_summary
+        assert final_brief.topic == expected_topic
+        assert final_brief.key_insights == cached_dumps[2]["key_insights"]
+        assert len(final_brief.references) > 0
     
-    @patch('app.nodes.get_primary_llm')
-    @patch('app.nodes.get_secondary_llm')
-    @patch('app.nodes.search_tool')
-    @pytest.mark.asyncio
-    async def test_follow_up_query_execution(
+    async def test_unfused_follow_up_renders_history_once(
         self,
-        mock_search_tool,
-        mock_secondary_llm,
-        mock_primary_llm,
-        mock_initial_state: GraphState
+        node_mocks: Dict[str, Mock],
+        mock_initial_state: GraphState,
+        cached_dumps: tuple,
+        cached_structured_llms: tuple
     ):
-        """Test graph execution with follow-up query."""
-        # Modify state for follow-up
+        """Test the history the planner renders is reused by context_summarizer."""
+        structured_llms = {
+            ResearchPlan: cached_structured_llms[0],
+            SourceSummaryBatch: cached_structured_llms[1],
+            ContextSummary: _structured_llm_returning({
+                "previous_topics": ["previous topic"],
+                "key_findings": ["Previous insight"],
+                "continuity_notes": "Summarized by the LLM"
+            })
+        }
+        node_mocks["create_structured_llm"].side_effect = (
+            lambda model_type, pydantic_class, system_prompt: structured_llms[pydantic_class]
+        )
+        node_mocks["create_streaming_structured_llm"].return_value = cached_structured_llms[2]
+        node_mocks["get_search_tool"].return_value.search_and_fetch_async = AsyncMock(
+            return_value=list(_FETCHED_CONTENT)
+        )
         mock_initial_state["is_follow_up"] = True
-        mock_initial_state["history"] = [
-            FinalBrief(
-                topic="previous topic",
-                executive_summary="Previous research summary with sufficient length to meet the minimum requirement of 50 characters for validation",
-                synthesis="Previous synthesis with sufficient length to meet the minimum requirement",
-                key_insights=["Previous insight"],
-                references=[],
-                metadata={}
-            )
-        ]
-        
-        # Mock LLM responses
-        mock_primary_llm.return_value = Mock()
-        mock_secondary_llm.return_value = Mock()
+        mock_initial_state["history"] = [_PREVIOUS_HISTORY_BRIEF]
         
-        # Mock search tool
-        mock_search_tool.search_and_fetch.return_value = [
-            {
-                "url": "https://example.com/follow-up",
-                "title": "Follow-up Research",
-                "content": "Follow-up content...",
-                "word_count": 300,
-                "extracted_at": 1234567890
-            }
-        ]
+        # Unfused planning, with context_summarizer taking its LLM path even for one brief
+        with patch('app.graph.settings.FUSED_PLANNING', False), \
+             patch('app.nodes.settings.LLM_CONTEXT_SUMMARY_MIN_HISTORY', 0), \
+             patch('app.nodes.format_history_context', wraps=format_history_context) as mock_render:
+            final_state = await research_graph.ainvoke(mock_initial_state)
         
-        # Mock structured LLM responses
-        with patch('app.nodes.create_structured_llm') as mock_structured_llm:
-            mock_plan = ResearchPlan(
-                queries=["follow-up query"],
-                rationale="Follow-up research strategy",
-                expected_sources=3,
-                focus_areas=["follow-up area"]
-            )
-            
-            mock_summary = SourceSummary(
-                url="https://example.com/follow-up",
-                title="Follow-up Research",
-                summary="Follow-up research content",
-                relevance_score=0.8,
-                key_points=["Follow-up point"],
-                source_type="article",
-                publication_date="2024-01-15",
-                author="Follow-up Author"
-            )
-            
-            mock_final_brief = FinalBrief(
-                topic="follow-up topic",
-                executive_summary="Follow-up executive summary with sufficient length to meet the minimum requirement of 50 characters for validation",
-                synthesis="Follow-up synthesis with sufficient length to meet the minimum requirement",
-                key_insights=["Follow-up insight"],
-                references=[mock_summary],
-                metadata={}
+        mock_render.assert_called_once()
+        context_input = structured_llms[ContextSummary].invoke.call_args[0][0]["input"]
+        assert final_state["history_context"] in context_input
+        assert final_state["context_summary"].continuity_notes == "Summarized by the LLM"
+        assert final_state["final_brief"].key_insights == cached_dumps[2]["key_insights"]
+
+    async def test_synthesizer_streams_partial_brief(
+        self,
+        node_mocks: Dict[str, Mock],
+        mock_initial_state: GraphState,
+        cached_dumps: tuple,
+        cached_structured_llms: tuple
+    ):
+        """Test that partial brief sections reach consumers as custom stream events."""
+        plan_llm, summary_llm, synthesis_llm = cached_structured_llms
+        node_mocks["create_structured_llm"].side_effect = [plan_llm, summary_llm]
+        node_mocks["create_streaming_structured_llm"].return_value = synthesis_llm
+        node_mocks["get_search_tool"].return_value.search_and_fetch_async = AsyncMock(
+            return_value=list(_FETCHED_CONTENT)
+        )
+
+        partial_briefs = [
+            event["partial_brief"]
+            async for mode, event in research_graph.astream(
+                mock_initial_state,
+                stream_mode=["updates", "custom"]
             )
-            
-            # Create mock LLM instances
-            mock_plan_llm = Mock()
-            mock_plan_llm.invoke.return_value = Mock(content=mock_plan.model_dump())
-            
-            mock_summary_llm = Mock()
-            mock_summary_llm.invoke.return_value = Mock(content=mock_summary.model_dump())
-            
-            mock_synthesis_llm = Mock()
-            mock_synthesis_llm.invoke.return_value = Mock(content=mock_final_brief.model_dump())
-            
-            # Configure mock responses
-            mock_structured_llm.side_effect = [mock_plan_llm, mock_summary_llm, mock_synthesis_llm]
-            
-            # Execute graph
-            final_brief = None
-            async for event in research_graph.astream(mock_initial_state):
-                for node_name, node_output in event.items():
-                    if node_name != "__end__":
-                        if "final_brief" in node_output:
-                            final_brief = node_output["final_brief"]
-            
-            # Assertions
-            assert final_brief is not None
-            assert final_brief.topic == "follow-up topic"
-    
-    @patch('app.nodes.get_primary_llm')
-    @patch('app.nodes.get_secondary_llm')
-    @patch('app.nodes.search_tool')
-    @pytest.mark.asyncio
-    async def test_graph_state_progression(
+            if mode == "custom"
+        ]
+
+        assert partial_briefs
+        assert cached_dumps[2]["executive_summary"].startswith(partial_briefs[0]["executive_summary"])
+
+    async def test_graph_execution_with_error(
         self,
-        mock_search_tool,
-        mock_secondary_llm,
-        mock_primary_llm,
+        node_mocks: Dict[str, Mock],
         mock_initial_state: GraphState
     ):
-        """Test that graph state progresses correctly through nodes."""
-        # Mock LLM responses
-        mock_primary_llm.return_value = Mock()
-        mock_secondary_llm.return_value = Mock()
+        """Test graph execution with error handling."""
+        # Mock LLMs to raise exception
+        node_mocks["create_structured_llm"].side_effect = Exception("LLM API error")
+        node_mocks["create_streaming_structured_llm"].side_effect = Exception("LLM API error")
+        node_mocks["get_search_tool"].return_value.search_and_fetch_async = AsyncMock(return_value=[])
         
-        # Mock search tool
-        mock_search_tool.search_and_fetch.return_value = [
-            {
-                "url": "https://example.com/test",
-                "title": "Test Article",
-                "content": "Test content...",
-                "word_count": 200,
-                "extracted_at": 1234567890
-            }
-        ]
+        # Execute graph; only the terminal state matters
+        final_state = await research_graph.ainvoke(mock_initial_state)
+        final_brief = final_state["final_brief"]
         
-        # Mock structured LLM responses
-        with patch('app.nodes.create_structured_llm') as mock_structured_llm:
-            mock_plan = ResearchPlan(
-                queries=["test query"],
-                rationale="Test rationale",
-                expected_sources=3,
-                focus_areas=["test area"]
-            )
-            
-            mock_summary = SourceSummary(
-                url="https://example.com/test",
-                title="Test Article",
-                summary="Test summary",
-                relevance_score=0.7,
-                key_points=["Test point"],
-                source_type="article",
-                publication_date="2024-01-15",
-                author="Test Author"
-            )
-            
-            mock_final_brief = FinalBrief(
-                topic="test topic",
-                executive_summary="Test executive summary with sufficient length to meet the minimum requirement of 50 characters for validation",
-                synthesis="Test synthesis with sufficient length to meet the minimum requirement",
-                key_insights=["Test insight"],
-                references=[mock_summary],
-                metadata={}
-            )
-            
-            # Create mock LLM instances
-            mock_plan_llm = Mock()
-            mock_plan_llm.invoke.return_value = Mock(content=mock_plan.model_dump())
-            
-            mock_summary_llm = Mock()
-            mock_summary_llm.invoke.return_value = Mock(content=mock_summary.model_dump())
-            
-            mock_synthesis_llm = Mock()
-            mock_synthesis_llm.invoke.return_value = Mock(content=mock_final_brief.model_dump())
-            
-            # Configure mock responses
-            mock_structured_llm.side_effect = [mock_plan_llm, mock_summary_llm, mock_synthesis_llm]
-            
-            # Track state progression
-            state_progression = []
-            
-            async for event in research_graph.astream(mock_initial_state):
-                for node_name, node_output in event.items():
-                    if node_name != "__end__":
-                        state_progression.append(node_name)
-            
-            # Verify node execution order
-            expected_nodes = ["planner", "search_and_fetch", "per_source_summarizer", "synthesizer"]
-            assert state_progression == expected_nodes 
\ No newline at end of file
+        # Should still get a final brief (error handler)
+        assert final_brief is not None
+        assert "error" in final_brief.metadata or "Error" in final_brief.executive_summary
+    
+
+
+class TestGraphRouting:
+    """Test conditional routing in the research graph."""
+    
+    def test_new_query_routes_to_planner(self):
+        """Test that queries without history go straight to planning."""
+        assert should_summarize_context({"is_follow_up": False, "history": []}) == "planner"
+    
+    @pytest.mark.parametrize("fused, expected", [
+        (True, "plan_with_context"),
+        (False, "planner")
+    ])
+    def test_follow_up_routing(self, fused, expected):
+        """Test that follow-ups route according to the fused planning flag."""
+        state = {"is_follow_up": True, "history": [Mock()]}
+        with patch('app.graph.settings.FUSED_PLANNING', fused):
+            assert should_summarize_context(state) == expected
+    
+    def test_summarization_joins_both_branches(self):
+        """Test that per-source summarization waits for context summarization and search together."""
+        builder = research_graph.builder
+        assert builder.waiting_edges == {(("context_summarizer", "search_and_fetch"), "per_source_summarizer")}
+        assert not any(end == "per_source_summarizer" for _, end in builder.edges)
\ No newline at end of file
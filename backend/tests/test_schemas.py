@@ -3,7 +3,8 @@ Unit tests for Pydantic schemas using Azure OpenAI.
 """
 
 import pytest
-from datetime import datetime
+from datetime import datetime, timedelta
+from hypothesis import given, settings as hypothesis_settings, strategies as st
 from pydantic import ValidationError
 
 from app.schemas import (
@@ -12,43 +13,74 @@ from app.schemas import (
     ContextSummary,
     FinalBrief,
     BriefRequest,
+    PlanWithContext,
     ResearchDepth
 )
 
+# Example budget for the property-based tests; the validators are cheap, so 25
+# examples per test keeps the suite fast while still probing the constrained ranges
+_PROPERTY_SETTINGS = hypothesis_settings(max_examples=25, deadline=None)
+
+
+def _assert_rejected_at(model, fields, field):
+    """
+    Assert that validating the fields fails on the given field alone.
+    
+    Args:
+        model: Schema class to validate with
+        fields: Field values, valid apart from the one under test
+        field: Name of the field that must be the only error location
+    """
+    with pytest.raises(ValidationError) as exc_info:
+        model(**fields)
+    assert [error["loc"] for error in exc_info.value.errors()] == [(field,)]
+
 
 class TestResearchPlan:
     """Test ResearchPlan schema."""
     
-    def test_valid_research_plan(self):
-        """Test creating a valid research plan."""
+    @_PROPERTY_SETTINGS
+    @given(
+        queries=st.lists(st.text(min_size=1), min_size=1, max_size=10),
+        expected_sources=st.integers(min_value=1, max_value=15)
+    )
+    def test_valid_research_plan(self, queries, expected_sources):
+        """Test any non-empty query list and in-range source count is accepted."""
         plan = ResearchPlan(
-            queries=["test query 1", "test query 2"],
+            queries=queries,
             rationale="Test rationale",
-            expected_sources=5,
+            expected_sources=expected_sources,
             focus_areas=["area 1", "area 2"]
         )
         
-        assert len(plan.queries) == 2
-        assert plan.expected_sources == 5
+        assert plan.queries == queries
+        assert plan.expected_sources == expected_sources
         assert len(plan.focus_areas) == 2
     
-    def test_invalid_queries_empty(self):
-        """Test validation with empty queries list."""
-        with pytest.raises(ValidationError):
-            ResearchPlan(
-                queries=[],
-                rationale="Test rationale",
-                expected_sources=5,
-                focus_areas=["area 1"]
-            )
+    @pytest.mark.parametrize("field, value", [
+        ("queries", []),
+        ("expected_sources", 0),
+        ("expected_sources", 16)
+    ])
+    def test_boundary_values_rejected(self, field, value):
+        """Test the first value past each constraint is rejected on that field only."""
+        fields = {
+            "queries": ["test query"],
+            "rationale": "Test rationale",
+            "expected_sources": 5,
+            "focus_areas": ["area 1"]
+        }
+        _assert_rejected_at(ResearchPlan, {**fields, field: value}, field)
     
-    def test_invalid_expected_sources(self):
-        """Test validation with invalid expected sources."""
-        with pytest.raises(ValidationError):
+    @_PROPERTY_SETTINGS
+    @given(expected_sources=st.one_of(st.integers(max_value=0), st.integers(min_value=16)))
+    def test_invalid_expected_sources(self, expected_sources):
+        """Test source counts outside 1-15 are rejected."""
+        with pytest.raises(ValidationError, match="expected_sources"):
             ResearchPlan(
                 queries=["test query"],
                 rationale="Test rationale",
-                expected_sources=20,  # Too high
+                expected_sources=expected_sources,
                 focus_areas=["area 1"]
             )
 
@@ -56,46 +88,44 @@ class TestResearchPlan:
 class TestSourceSummary:
     """Test SourceSummary schema."""
     
-    def test_valid_source_summary(self):
-        """Test creating a valid source summary."""
-        summary = SourceSummary(
-            url="https://example.com",
-            title="Test Title",
-            summary="Test summary content",
-            relevance_score=0.8,
-            key_points=["point 1", "point 2"],
-            source_type="article",
-            publication_date="2024-01-01",
-            author="Test Author"
-        )
+    @_PROPERTY_SETTINGS
+    @given(
+        relevance=st.floats(0, 1),
+        key_points=st.lists(st.text(min_size=1), min_size=1, max_size=10)
+    )
+    def test_valid_source_summary(self, sample_source_kwargs, relevance, key_points):
+        """Test any relevance score in [0, 1] is accepted."""
+        summary = SourceSummary(**{
+            **sample_source_kwargs,
+            "relevance_score": relevance,
+            "key_points": key_points
+        })
         
-        assert summary.relevance_score == 0.8
-        assert len(summary.key_points) == 2
+        assert summary.relevance_score == relevance
+        assert summary.key_points == key_points
         assert summary.source_type == "article"
     
-    def test_invalid_relevance_score(self):
-        """Test validation with invalid relevance score."""
-        with pytest.raises(ValidationError):
-            SourceSummary(
-                url="https://example.com",
-                title="Test Title",
-                summary="Test summary",
-                relevance_score=1.5,  # Too high
-                key_points=["point 1"],
-                source_type="article"
-            )
+    @pytest.mark.parametrize("field, value", [
+        ("relevance_score", -0.01),
+        ("relevance_score", 1.01)
+    ])
+    def test_boundary_values_rejected(self, sample_source_kwargs, field, value):
+        """Test the first value past each constraint is rejected on that field only."""
+        _assert_rejected_at(SourceSummary, {**sample_source_kwargs, field: value}, field)
     
-    def test_invalid_summary_length(self):
-        """Test validation with too short summary."""
-        with pytest.raises(ValidationError):
-            SourceSummary(
-                url="https://example.com",
-                title="Test Title",
-                summary="Short",  # Too short
-                relevance_score=0.5,
-                key_points=["point 1"],
-                source_type="article"
-            )
+    @pytest.mark.parametrize("source_type", ["article", "paper", "web page", "error"])
+    def test_source_type_is_free_form(self, sample_source_kwargs, source_type):
+        """Test source_type stays a plain string, accepting the types the nodes assign."""
+        assert SourceSummary.model_fields["source_type"].annotation is str
+        summary = SourceSummary(**{**sample_source_kwargs, "source_type": source_type})
+        assert summary.source_type == source_type
+    
+    @_PROPERTY_SETTINGS
+    @given(relevance=st.one_of(st.floats(max_value=-0.01), st.floats(min_value=1.01)))
+    def test_invalid_relevance_score(self, sample_source_kwargs, relevance):
+        """Test relevance scores outside [0, 1] are rejected."""
+        with pytest.raises(ValidationError, match="relevance_score"):
+            SourceSummary(**{**sample_source_kwargs, "relevance_score": relevance})
 
 
 class TestContextSummary:
@@ -123,6 +153,54 @@ class TestContextSummary:
         )
         
         assert context.user_preferences == {}
+    
+    def test_prompt_text_is_rendered_once(self):
+        """Test the prompt rendering shared by planner and synthesizer."""
+        context = ContextSummary(
+            previous_topics=["topic 1", "topic 2"],
+            key_findings=["finding 1"],
+            continuity_notes="Test notes"
+        )
+        
+        assert context.as_prompt_text == "Previous topics: topic 1, topic 2\nKey findings: finding 1"
+        assert context.as_prompt_text is context.as_prompt_text
+        assert "as_prompt_text" not in context.model_dump()
+
+
+class TestPlanWithContext:
+    """Test PlanWithContext schema."""
+    
+    def test_valid_plan_with_context(self):
+        """Test creating a combined context summary and plan."""
+        combined = PlanWithContext(
+            context=ContextSummary(
+                previous_topics=["topic 1"],
+                key_findings=["finding 1"],
+                continuity_notes="Builds on topic 1"
+            ),
+            plan=ResearchPlan(
+                queries=["test query"],
+                rationale="Test rationale",
+                expected_sources=5,
+                focus_areas=["area 1"]
+            )
+        )
+        
+        assert combined.context.previous_topics == ["topic 1"]
+        assert len(combined.plan.queries) == 1
+    
+    def test_context_is_optional(self):
+        """Test that the context part may be omitted."""
+        combined = PlanWithContext(
+            plan=ResearchPlan(
+                queries=["test query"],
+                rationale="Test rationale",
+                expected_sources=5,
+                focus_areas=["area 1"]
+            )
+        )
+        
+        assert combined.context is None
 
 
 class TestFinalBrief:
@@ -153,9 +231,55 @@ class TestFinalBrief:
         assert len(brief.key_insights) == 2
         assert len(brief.references) == 1
         assert brief.generated_at is not None
+        assert brief.generated_at.utcoffset() == timedelta(0)
     
-    def test_invalid_executive_summary_length(self):
-        """Test validation with too short executive summary."""
+    @_PROPERTY_SETTINGS
+    @given(
+        executive_summary=st.text(min_size=50, max_size=200),
+        key_insights=st.lists(st.text(), max_size=10)
+    )
+    def test_valid_executive_summary_length(self, sample_source, executive_summary, key_insights):
+        """Test any executive summary of at least 50 characters is accepted."""
+        brief = FinalBrief(
+            topic="Test Topic",
+            executive_summary=executive_summary,
+            synthesis="Test synthesis with sufficient length",
+            key_insights=key_insights,
+            references=[sample_source]
+        )
+        
+        assert brief.executive_summary == executive_summary
+        assert brief.key_insights == key_insights
+    
+    @pytest.mark.parametrize("field, value", [
+        ("executive_summary", "x" * 49)
+    ])
+    def test_boundary_values_rejected(self, field, value):
+        """Test the first value past each constraint is rejected on that field only."""
+        fields = {
+            "topic": "Test Topic",
+            "executive_summary": "Test executive summary with sufficient length to meet requirements",
+            "synthesis": "Test synthesis",
+            "key_insights": ["insight 1"],
+            "references": []
+        }
+        _assert_rejected_at(FinalBrief, {**fields, field: value}, field)
+    
+    @_PROPERTY_SETTINGS
+    @given(executive_summary=st.text(max_size=49))
+    def test_invalid_executive_summary_length(self, sample_source, executive_summary):
+        """Test executive summaries under 50 characters are rejected."""
+        with pytest.raises(ValidationError, match="executive_summary"):
+            FinalBrief(
+                topic="Test Topic",
+                executive_summary=executive_summary,
+                synthesis="Test synthesis with sufficient length",
+                key_insights=["insight 1"],
+                references=[sample_source]
+            )
+    
+    def test_brief_is_immutable(self):
+        """Test that briefs are frozen and nested references are reused, not copied."""
         source = SourceSummary(
             url="https://example.com",
             title="Test Source",
@@ -166,38 +290,63 @@ class TestFinalBrief:
             publication_date="2024-01-15",
             author="Test Author"
         )
+        brief = FinalBrief(
+            topic="Test Topic",
+            executive_summary="Test executive summary with sufficient length to meet requirements",
+            synthesis="Test synthesis",
+            key_insights=["insight 1"],
+            references=[source]
+        )
         
+        assert brief.references[0] is source
         with pytest.raises(ValidationError):
-            FinalBrief(
-                topic="Test Topic",
-                executive_summary="Short",  # Too short
-                synthesis="Test synthesis with sufficient length",
-                key_insights=["insight 1"],
-                references=[source]
-            )
+            brief.topic = "Changed"
+        with pytest.raises(ValidationError):
+            source.url = "https://changed.example.com"
+        assert brief.model_copy(update={"topic": "Changed"}).topic == "Changed"
 
 
 class TestBriefRequest:
     """Test BriefRequest schema."""
     
-    def test_valid_brief_request(self):
-        """Test creating a valid brief request."""
+    @_PROPERTY_SETTINGS
+    @given(
+        topic=st.text(min_size=5, max_size=200),
+        depth=st.sampled_from(ResearchDepth)
+    )
+    def test_valid_brief_request(self, topic, depth):
+        """Test any topic of at least 5 characters is accepted at every depth."""
         request = BriefRequest(
-            topic="Test research topic",
-            depth=ResearchDepth.MODERATE,
+            topic=topic,
+            depth=depth,
             follow_up=False,
             user_id="test-user"
         )
         
-        assert request.topic == "Test research topic"
-        assert request.depth == ResearchDepth.MODERATE
+        assert request.topic == topic
+        assert request.depth == depth
         assert request.follow_up is False
     
-    def test_invalid_topic_length(self):
-        """Test validation with too short topic."""
-        with pytest.raises(ValidationError):
+    @pytest.mark.parametrize("field, value", [
+        ("topic", "Test")
+    ])
+    def test_boundary_values_rejected(self, field, value):
+        """Test the first value past each constraint is rejected on that field only."""
+        fields = {
+            "topic": "Test research topic",
+            "depth": ResearchDepth.MODERATE,
+            "follow_up": False,
+            "user_id": "test-user"
+        }
+        _assert_rejected_at(BriefRequest, {**fields, field: value}, field)
+    
+    @_PROPERTY_SETTINGS
+    @given(topic=st.text(max_size=4))
+    def test_invalid_topic_length(self, topic):
+        """Test topics under 5 characters are rejected."""
+        with pytest.raises(ValidationError, match="topic"):
             BriefRequest(
-                topic="Test",  # Too short
+                topic=topic,
                 depth=ResearchDepth.MODERATE,
                 follow_up=False,
                 user_id="test-user"
@@ -222,4 +371,15 @@ class TestResearchDepth:
             user_id="test-user"
         )
         
-        assert request.depth == ResearchDepth.DEEP 
\ No newline at end of file
+        assert request.depth == ResearchDepth.DEEP
+    
+    def test_depth_is_a_plain_string(self):
+        """Test that depth accepts enum members or strings and rejects unknown levels."""
+        for depth in (ResearchDepth.SHALLOW, "shallow"):
+            request = BriefRequest(topic="Test topic with sufficient length", depth=depth, user_id="test-user")
+            assert type(request.depth) is str
+            assert request.depth == "shallow"
+        
+        assert BriefRequest(topic="Test topic with sufficient length", user_id="test-user").depth == "moderate"
+        with pytest.raises(ValidationError):
+            BriefRequest(topic="Test topic with sufficient length", depth="extreme", user_id="test-user")